@@ -0,0 +1,100 @@
+"""
+Measure the memory of the loaded issues in bytes per issue.
+
+The issues, with comments and attachments, are built from a synthetic JSON
+issue list with `Issue.list_from_json`, once with the slotted model classes of
+`ytissues.ytlib` and once with replicas of them, which store their attributes
+in a per-instance `__dict__` (the model classes before `__slots__`).
+
+Usage: PYTHONPATH=src python benchmarks/memory_per_issue.py [ISSUES]
+
+"""
+import random
+import sys
+import tracemalloc
+
+from ytissues import ytlib
+
+
+def synthetic_issues(count: int) -> list[dict]:
+    """Return `count` items of a deep JSON issue list (see `Issue.query_fields`)."""
+    randomizer = random.Random(42)
+    authors = [f"User {number}" for number in range(20)]
+    issues = []
+    for number in range(1, count + 1):
+        created = 1637000000000 + number * 60000
+        comments = [
+            {
+                "id": f"4-{number}{index}",
+                "text": f"Comment {index} of issue {number}. " * 3,
+                "created": created + index,
+                "updated": created + index,
+                "author": {"name": randomizer.choice(authors)},
+                "attachments": [],
+            }
+            for index in range(randomizer.randint(0, 4))
+        ]
+        attachments = [
+            {
+                "name": f"screenshot{index}.png",
+                "size": randomizer.randint(1000, 100000),
+                "mimeType": "image/png",
+                "extension": "png",
+                "charset": None,
+                "url": f"/api/files/8-{number}{index}?sign=abc",
+            }
+            for index in range(randomizer.randint(0, 2))
+        ]
+        issues.append(
+            {
+                "id": f"2-{number}",
+                "idReadable": f"BENCH-{number}",
+                "summary": f"The title of issue number {number}",
+                "description": f"Some explanations of issue {number}. " * 5,
+                "created": created,
+                "updated": created + 1000,
+                "resolved": created + 2000 if number % 3 else None,
+                "commentsCount": len(comments),
+                "comments": comments,
+                "attachments": attachments,
+            }
+        )
+    return issues
+
+
+def dict_backed(cls: type) -> type:
+    """Return a copy of the model class `cls` without `__slots__`."""
+    namespace = {
+        name: value
+        for name, value in vars(cls).items()
+        if name not in cls.__slots__ and name != "__slots__"
+    }
+    return type(cls.__name__, (), namespace)
+
+
+def bytes_per_issue(json_data: list[dict]) -> float:
+    tracemalloc.start()
+    try:
+        issues = ytlib.Issue.list_from_json(json_data, "0-1")
+        allocated, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return allocated / len(issues)
+
+
+def main(count: int):
+    json_data = synthetic_issues(count)
+    slotted = bytes_per_issue(json_data)
+    models = ytlib.Issue, ytlib.IssueComment, ytlib.IssueAttachment
+    ytlib.Issue, ytlib.IssueComment, ytlib.IssueAttachment = map(dict_backed, models)
+    try:
+        with_dict = bytes_per_issue(json_data)
+    finally:
+        ytlib.Issue, ytlib.IssueComment, ytlib.IssueAttachment = models
+    print(f"{count} issues")
+    print(f"__dict__:  {with_dict:8.0f} bytes per issue")
+    print(f"__slots__: {slotted:8.0f} bytes per issue ({slotted / with_dict:.0%})")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,226 @@
+"""
+Asyncio client for the youtrack service.
+
+The coroutines mirror the loaders of `ytissues.ytlib` and use the same requests
+and the same parsing of the responses. The blocking calls run in the thread pool
+of an `AsyncClient`, so that many small requests can be in flight at once. A
+semaphore limits the number of concurrent requests.
+
+Example:
+
+    async with AsyncClient(max_concurrency=16) as client:
+        for project in await client.get_projects():
+            await client.backup_project(project, "backup_dir")
+
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Awaitable, Callable, Iterable
+
+from ytissues import ytlib
+from ytissues.manifest import AttachmentIndex, BackupJournal, BackupManifest
+from ytissues.search import SearchIndex
+from ytissues.ytlib import Issue, IssueAttachment, IssueComment, Project
+
+
+class AsyncClient:
+    """Run the requests to the YT service concurrently from asyncio code.
+
+    All coroutines of one client share its semaphore and its thread pool, so
+    `max_concurrency` is the limit for all requests made by the client.
+    """
+
+    def __init__(self, max_concurrency: int = 8):
+        if max_concurrency < 1:
+            raise ValueError(f"Concurrency must be positive: {max_concurrency}")
+        self.max_concurrency = max_concurrency
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_concurrency, thread_name_prefix="AsyncClient"
+        )
+
+    async def __aenter__(self) -> "AsyncClient":
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+    async def run(self, func: Callable, *args):
+        """Run the blocking `func(*args)` in the thread pool of the client."""
+        async with self._semaphore:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, func, *args)
+
+    async def map(self, coroutine: Callable[..., Awaitable], items: Iterable) -> list:
+        """Await `coroutine(item)` for all items concurrently, keep the order."""
+        return await asyncio.gather(*(coroutine(item) for item in items))
+
+    async def get_json(self, the_request) -> list | dict:
+        return await self.run(ytlib.get_json, the_request)
+
+    async def get_projects(self, project_id: str = None) -> list[Project]:
+        json_data = await self.get_json(Project.list_request(project_id))
+        return Project.list_from_json(json_data)
+
+    async def get_project(self, project_id: str) -> Project:
+        projects = await self.get_projects(project_id)
+        if len(projects) != 1:
+            raise ValueError(f"Project with ID '{project_id}' not found!")
+        return projects[0]
+
+    async def iter_issue_pages(
+        self,
+        project_id: str,
+        page_size: int = None,
+        deep: bool = False,
+        query: str = None,
+    ) -> AsyncIterator[list[Issue]]:
+        """Yield the issues of project `project_id` as lists, one per page.
+
+        The arguments are the same as for `Issue.iter_load`.
+        """
+        page_size = Issue.page_size if page_size is None else page_size
+        if page_size < 1:
+            raise ValueError(f"Page size must be positive: {page_size}")
+        resource = Issue.list_resource(project_id, query)
+        list_query = Issue.list_query(deep, query)
+        skip = 0
+        while True:
+            json_data = await self.get_json(
+                ytlib.get_page_request(resource, list_query, skip, page_size)
+            )
+            yield Issue.list_from_json(json_data, project_id)
+            if not isinstance(json_data, list) or len(json_data) < page_size:
+                return
+            skip += page_size
+
+    async def load_issues(self, project_id: str, page_size: int = None) -> list:
+        issues = []
+        async for page in self.iter_issue_pages(project_id, page_size):
+            issues.extend(page)
+        return issues
+
+    async def load_comments(self, issue_id: str) -> list:
+        json_data = await self.get_json(IssueComment.list_request(issue_id))
+        return IssueComment.list_from_json(json_data)
+
+    async def load_attachments(self, issue_id: str) -> list:
+        json_data = await self.get_json(IssueAttachment.list_request(issue_id))
+        return IssueAttachment.list_from_json(json_data, issue_id)
+
+    async def count_issues(self, project_id: str) -> int:
+        """Return the number of issues of a project, see `Issue.count`."""
+        resource = Issue.get_list.format(project_id=project_id)
+        count, skip = 0, 0
+        while True:
+            json_data = await self.get_json(
+                ytlib.get_page_request(
+                    resource,
+                    f"fields={Issue.count_fields}",
+                    skip,
+                    Issue.count_page_size,
+                )
+            )
+            count += Issue.count_page(json_data)
+            if (
+                not isinstance(json_data, list)
+                or len(json_data) < Issue.count_page_size
+            ):
+                return count
+            skip += Issue.count_page_size
+
+    async def load_issue_counts(self, projects: Iterable[Project]):
+        """Count the issues of all `projects` concurrently for `issue_count`."""
+
+        async def count(project: Project):
+            if project._issues is None and project._issue_count is None:
+                project._issue_count = await self.count_issues(project.project_id)
+
+        await self.map(count, projects)
+
+    async def load_project_issues(self, projects: Iterable[Project]):
+        """Load the issues of all `projects` concurrently into `Project.issues`."""
+
+        async def load(project: Project):
+            if project._issues is None:
+                project._issues = await self.load_issues(project.project_id)
+
+        await self.map(load, projects)
+
+    async def prefetch(self, issue: Issue):
+        """Load comments and attachments of `issue` concurrently."""
+
+        async def comments():
+            if issue._comments is None:
+                issue._comments = await self.load_comments(issue.issue_id)
+
+        async def attachments():
+            if issue._attachments is None:
+                issue._attachments = await self.load_attachments(issue.issue_id)
+
+        await asyncio.gather(comments(), attachments())
+
+    async def backup_issue(
+        self,
+        issue: Issue,
+        project_path,
+        manifest: BackupManifest = None,
+        index: AttachmentIndex = None,
+        journal: BackupJournal = None,
+        search_index: SearchIndex = None,
+    ):
+        if not (journal and journal.is_issue_done(issue.issue_id)):
+            await self.prefetch(issue)
+        await self.run(
+            issue.backup, project_path, manifest, index, journal, search_index
+        )
+
+    async def backup_project(
+        self,
+        project: Project,
+        backup_pathname: str,
+        incremental: bool = False,
+        journal: BackupJournal = None,
+    ):
+        """Write the same files as `Project.backup`, with overlapping requests.
+
+        While the issues of one page are saved, the next page is requested.
+        """
+        if journal and journal.is_project_done(project.project_id):
+            return
+        project_path = project.create_backup_path(backup_pathname)
+        manifest = BackupManifest.load(project_path) if incremental else None
+        query = manifest.updated_query() if manifest else None
+        index = AttachmentIndex.load(project_path.parent)
+        search_index = SearchIndex.open(project_path.parent)
+        pending = None
+        try:
+            async for page in self.iter_issue_pages(
+                project.project_id,
+                deep=True,
+                query=project.search_query(query) if query else None,
+            ):
+                if manifest:
+                    page = [issue for issue in page if not manifest.is_unchanged(issue)]
+                if pending is not None:
+                    await pending
+                pending = asyncio.ensure_future(
+                    self.map(
+                        lambda issue: self.backup_issue(
+                            issue, project_path, manifest, index, journal, search_index
+                        ),
+                        page,
+                    )
+                )
+            if pending is not None:
+                await pending
+        finally:
+            index.save()
+            search_index.close()
+        if manifest:
+            manifest.save()
+        if journal:
+            journal.project_done(project.project_id)
@@ -0,0 +1,127 @@
+"""
+Backup into a single archive file.
+
+Instead of a directory with a markdown file and the attachments for every
+issue, the same files are written into one tar or zip archive, sequentially
+and without creating any directory. A tar archive can also be written to
+stdout, for example to pipe it into a compressor.
+
+"""
+import os
+import shutil
+import sys
+import tarfile
+import tempfile
+import threading
+import time
+import zipfile
+from pathlib import Path
+
+
+class BackupArchive:
+    """A tar or zip archive written as stream, usable as context manager.
+
+    The format is chosen by the suffix of the target; `-` writes a tar
+    archive to stdout. The methods may be called from several threads at once.
+    """
+
+    tar_modes = {
+        ".tar": "w|",
+        ".tar.gz": "w|gz",
+        ".tgz": "w|gz",
+        ".tar.bz2": "w|bz2",
+        ".tar.xz": "w|xz",
+    }
+    suffixes = (*tar_modes, ".zip")
+
+    def __init__(self, target: str):
+        self.tar = None
+        self.zip = None
+        if target == "-":
+            self.tar = tarfile.open(fileobj=sys.stdout.buffer, mode="w|")
+        elif target.endswith(".zip"):
+            self.zip = zipfile.ZipFile(target, "w", zipfile.ZIP_DEFLATED)
+        else:
+            mode = next(
+                (
+                    mode
+                    for suffix, mode in self.tar_modes.items()
+                    if target.endswith(suffix)
+                ),
+                None,
+            )
+            if mode is None:
+                raise ValueError(
+                    f"Unknown archive type of '{target}', use one of "
+                    + ", ".join(self.suffixes)
+                )
+            self.tar = tarfile.open(target, mode=mode)
+        self._temp_dir = tempfile.TemporaryDirectory(prefix="yt-archive-")
+        self._lock = threading.Lock()
+
+    def add_bytes(self, name: str, data: bytes):
+        """Add a file `name` with the content `data`."""
+        with self._lock:
+            if self.zip is not None:
+                self.zip.writestr(self._zip_info(name, time.time()), data)
+            else:
+                info = tarfile.TarInfo(name)
+                info.size = len(data)
+                info.mtime = int(time.time())
+                info.mode = 0o644
+                self.tar.addfile(info, fileobj=_BytesReader(data))
+
+    def add_file(self, name: str, path: Path):
+        """Add the file at `path` as `name`, copying it in chunks."""
+        with self._lock:
+            if self.zip is not None:
+                info = self._zip_info(name, path.stat().st_mtime)
+                with path.open("rb") as source, self.zip.open(info, "w") as target:
+                    shutil.copyfileobj(source, target)
+            else:
+                info = self.tar.gettarinfo(str(path), arcname=name)
+                info.uid = info.gid = 0
+                info.uname = info.gname = ""
+                with path.open("rb") as source:
+                    self.tar.addfile(info, fileobj=source)
+
+    @staticmethod
+    def _zip_info(name: str, mtime: float) -> zipfile.ZipInfo:
+        info = zipfile.ZipInfo(name, time.localtime(mtime)[:6])
+        info.compress_type = zipfile.ZIP_DEFLATED
+        info.external_attr = 0o644 << 16
+        return info
+
+    def temporary_path(self) -> Path:
+        """Return the path of a new temporary file, which the caller removes."""
+        handle, name = tempfile.mkstemp(dir=self._temp_dir.name)
+        os.close(handle)
+        return Path(name)
+
+    def close(self):
+        try:
+            if self.zip is not None:
+                self.zip.close()
+            else:
+                self.tar.close()
+        finally:
+            self._temp_dir.cleanup()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class _BytesReader:
+    """Minimal file object for `TarFile.addfile`."""
+
+    def __init__(self, data: bytes):
+        self.view = memoryview(data)
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            size = len(self.view)
+        chunk, self.view = self.view[:size], self.view[size:]
+        return bytes(chunk)
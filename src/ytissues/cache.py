@@ -0,0 +1,162 @@
+"""
+On-disk cache for the JSON responses of the youtrack service.
+
+Responses are stored by URL (including the requested fields) and token. A
+response younger than the TTL is used without asking the service. An older
+response is revalidated with `If-None-Match`/`If-Modified-Since`, if the
+service sent an `ETag` or `Last-Modified` header. When the cache grows beyond
+its maximum size, the least recently used responses are removed.
+
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable
+from urllib import request
+
+
+class ResponseCache:
+    """Cache of response bodies in the directory `cache_dir`.
+
+    Every response is stored as `<key>.body` with its metadata in `<key>.json`.
+    The modification time of the metadata file is the time of the last use.
+    The methods may be called from several threads at once.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path,
+        ttl: float = 600,
+        max_size: int = 100 * 1024 * 1024,
+        refresh: bool = False,
+    ):
+        """
+        Args:
+            cache_dir: The directory of the cache, created if missing.
+            ttl: Seconds a response is used without asking the service.
+            max_size: Maximum size of all cached response bodies in bytes.
+            refresh: Revalidate or reload all responses, regardless of the TTL.
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.max_size = max_size
+        self.refresh = refresh
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._size = sum(path.stat().st_size for path in self.cache_dir.glob("*.body"))
+
+    @staticmethod
+    def key(the_request: request.Request) -> str:
+        """Return the cache key of the URL and the token of `the_request`."""
+        authorization = the_request.get_header("Authorization", "")
+        return hashlib.sha256(
+            f"{the_request.full_url}\n{authorization}".encode()
+        ).hexdigest()
+
+    def get(self, the_request: request.Request, fetch: Callable) -> bytes:
+        """Return the body of the response to `the_request`.
+
+        Args:
+            the_request: The GET request.
+            fetch: Function to ask the service, called as `fetch(the_request)`.
+                It must return a tuple (status, headers, body), status 200 or 304.
+        """
+        key = self.key(the_request)
+        meta_path = self.cache_dir / f"{key}.json"
+        body_path = self.cache_dir / f"{key}.body"
+        try:
+            meta = json.loads(meta_path.read_text())
+            body = body_path.read_bytes()
+        except (FileNotFoundError, ValueError):
+            meta, body = None, None
+        if meta is not None:
+            if not self.refresh and time.time() - meta["stored"] < self.ttl:
+                self._touch(meta_path)
+                self.hits += 1
+                return body
+            if meta["etag"]:
+                the_request.add_unredirected_header("If-None-Match", meta["etag"])
+            if meta["last_modified"]:
+                the_request.add_unredirected_header(
+                    "If-Modified-Since", meta["last_modified"]
+                )
+        status, headers, new_body = fetch(the_request)
+        if status == 304 and meta is not None:
+            self.revalidated += 1
+            meta["stored"] = time.time()
+            self._write(meta_path, json.dumps(meta).encode())
+            return body
+        self.misses += 1
+        self.store(key, headers, new_body)
+        return new_body
+
+    def store(self, key: str, headers, body: bytes):
+        meta = {
+            "stored": time.time(),
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+        }
+        body_path = self.cache_dir / f"{key}.body"
+        with self._lock:
+            if body_path.exists():
+                self._size -= body_path.stat().st_size
+            self._size += len(body)
+        self._write(body_path, body)
+        self._write(self.cache_dir / f"{key}.json", json.dumps(meta).encode())
+        if self._size > self.max_size:
+            self.evict()
+
+    def evict(self):
+        """Remove the least recently used responses down to `max_size`."""
+        with self._lock:
+            entries = []
+            for meta_path in self.cache_dir.glob("*.json"):
+                try:
+                    entries.append((meta_path.stat().st_mtime, meta_path))
+                except FileNotFoundError:
+                    continue
+            for _, meta_path in sorted(entries):
+                if self._size <= self.max_size:
+                    break
+                body_path = meta_path.with_suffix(".body")
+                try:
+                    self._size -= body_path.stat().st_size
+                    body_path.unlink()
+                except FileNotFoundError:
+                    pass
+                meta_path.unlink(missing_ok=True)
+
+    def clear(self):
+        """Remove all cached responses."""
+        with self._lock:
+            for path in self.cache_dir.glob("*.body"):
+                path.unlink(missing_ok=True)
+            for path in self.cache_dir.glob("*.json"):
+                path.unlink(missing_ok=True)
+            self._size = 0
+
+    @staticmethod
+    def _touch(path: Path):
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    def _write(path: Path, data: bytes):
+        temp_path = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+        temp_path.write_bytes(data)
+        os.replace(temp_path, path)
+
+    def stats(self) -> str:
+        """Return a line with the numbers of cache hits and misses."""
+        return (
+            f"Response cache: {self.hits} hits, {self.revalidated} revalidated, "
+            f"{self.misses} misses."
+        )
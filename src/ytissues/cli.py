@@ -1,29 +1,156 @@
 import argparse
+import asyncio
+import os
 import sys
+from pathlib import Path
 
 from rich import box
 from rich.console import Console
 from rich.progress import track
 from rich.table import Table
 
-from ytissues.ytlib import Project, get_project, get_projects
+from ytissues import export, transport, ytlib
+from ytissues.aioclient import AsyncClient
+from ytissues.archive import BackupArchive
+from ytissues.cache import ResponseCache
+from ytissues.manifest import BackupJournal
+from ytissues.mirror import Mirror
+from ytissues.scheduler import RequestScheduler
+from ytissues.search import SearchIndex
+from ytissues.ytlib import Issue, Project, get_project, get_projects
 
 
 def backup(args):
     """Implements backup of one Project (-i project_id) or all."""
+    if args.archive:
+        archive_backup(args)
+        return
+    with BackupJournal.open(Path(args.backup_dir), resume=args.resume) as journal:
+        if args.export_format:
+            export_backup(args, journal)
+        elif args.use_async:
+            asyncio.run(backup_async(args, journal))
+        elif args.project_id:
+            project = get_project(args.project_id)
+            project.backup(
+                args.backup_dir,
+                jobs=args.jobs,
+                incremental=args.incremental,
+                journal=journal,
+            )
+        else:
+            projects = get_projects()
+            for project in track(projects, description="Downloading projects..."):
+                project.backup(
+                    args.backup_dir,
+                    jobs=args.jobs,
+                    incremental=args.incremental,
+                    journal=journal,
+                )
+
+
+def archive_backup(args):
+    """Implements backup into one archive file (or stdout)."""
+    with BackupArchive(args.archive) as backup_archive:
+        if args.project_id:
+            get_project(args.project_id).archive(backup_archive, jobs=args.jobs)
+        else:
+            projects = get_projects()
+            # the progress goes to stderr, stdout may be the archive
+            console = Console(stderr=True)
+            for project in track(
+                projects, description="Archiving projects...", console=console
+            ):
+                project.archive(backup_archive, jobs=args.jobs)
+
+
+def export_backup(args, journal: BackupJournal):
+    """Implements backup in an export format instead of markdown files."""
     if args.project_id:
-        project = get_project(args.project_id)
-        project.backup(args.backup_dir)
+        projects = [get_project(args.project_id)]
     else:
-        projects = get_projects()
-        for project in track(projects, description="Downloading projects..."):
-            project.backup(args.backup_dir)
+        projects = track(get_projects(), description="Exporting projects...")
+    for project in projects:
+        if journal.is_project_done(project.project_id):
+            continue
+        project_path = project.create_backup_path(args.backup_dir)
+        with export.ExportFiles(args.export_format, project_path) as writer:
+            export.export_project(project, writer)
+        journal.project_done(project.project_id)
+
+
+async def backup_async(args, journal: BackupJournal = None):
+    """Implements backup with the asyncio client, `args.jobs` requests at once."""
+    async with AsyncClient(max_concurrency=args.jobs) as client:
+        if args.project_id:
+            project = await client.get_project(args.project_id)
+            await client.backup_project(
+                project, args.backup_dir, args.incremental, journal
+            )
+        else:
+            projects = await client.get_projects()
+            for project in track(projects, description="Downloading projects..."):
+                await client.backup_project(
+                    project, args.backup_dir, args.incremental, journal
+                )
+
+
+async def load_issue_counts(projects: list[Project]):
+    async with AsyncClient(max_concurrency=ytlib.max_requests_per_host) as client:
+        await client.load_issue_counts(projects)
+
+
+def sync(args):
+    """Implements the update of the local mirror of one Project or all."""
+    with Mirror(args.db) as mirror:
+        if args.project_id:
+            projects = [get_project(args.project_id)]
+        else:
+            projects = track(get_projects(), description="Synchronizing projects...")
+        for project in projects:
+            mirror.sync(project, full=args.full)
+
+
+def search(args):
+    """Implements the full-text search in a backup."""
+    index_path = Path(args.backup_dir) / SearchIndex.filename
+    if not index_path.exists():
+        raise FileNotFoundError(f"No search index in '{args.backup_dir}'")
+    with SearchIndex(index_path) as search_index:
+        results = search_index.search(" ".join(args.query), limit=args.limit)
+    for result in results:
+        print(result.path)
+        print(f"    {' '.join(result.snippet.split())}")
+
+
+def ls_mirror(args):
+    """List from the local mirror, without requests to the YT service."""
+    with Mirror(args.db) as mirror:
+        if args.project_id is None:
+            print_projects(mirror.projects(), as_table=args.table, verbose=args.verbose)
+        else:
+            project = mirror.get_project(args.project_id)
+            issue_table = mirror.issue_table(project.project_id)
+            project.print_details(args.table, args.verbose, [issue_table])
 
 
 def ls(args):
     """List all or print a concrete project on stdout."""
-    if args.project_id is None:
+    if args.db:
+        ls_mirror(args)
+    elif args.export_format:
+        if args.project_id:
+            projects = [get_project(args.project_id)]
+        else:
+            projects = get_projects()
+        writer = export.stream_writer(args.export_format, sys.stdout)
+        for project in projects:
+            export.export_project(project, writer)
+        writer.close()
+    elif args.project_id is None:
         projects = get_projects()
+        if args.verbose:
+            asyncio.run(load_issue_counts(projects))
         print_projects(projects, as_table=args.table, verbose=args.verbose)
     else:  # list on project with issues and number of comments and attachments
         print_project_details(args.project_id, args.table, args.verbose)
@@ -31,6 +158,83 @@ def ls(args):
 
 def parse_arguments(args):
     parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--page-size",
+        type=int,
+        default=Issue.page_size,
+        metavar="N",
+        help=f"Number of issues requested per API call (default: {Issue.page_size}).",
+    )
+    parser.add_argument(
+        "--max-requests-per-host",
+        type=int,
+        default=ytlib.max_requests_per_host,
+        metavar="N",
+        help="Maximum number of concurrent requests to the YouTrack service "
+        f"(default: {ytlib.max_requests_per_host}).",
+    )
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=5,
+        metavar="N",
+        help="Retry requests failing with 429 or a server error N times, honouring "
+        "Retry-After or with exponential backoff (default: 5).",
+    )
+    parser.add_argument(
+        "--max-rate",
+        type=float,
+        metavar="R",
+        help="Send at most R requests per second. Without a limit, the rate is "
+        "only reduced when the service throttles.",
+    )
+    parser.add_argument(
+        "--pool-size",
+        type=int,
+        default=8,
+        metavar="N",
+        help="Number of idle HTTP connections kept open per host for reuse; "
+        "0 opens a new connection for every request (default: 8).",
+    )
+    parser.add_argument(
+        "--connection-stats",
+        action="store_true",
+        help="Print the number of opened and reused HTTP connections to stderr.",
+    )
+    cache_group = parser.add_argument_group(
+        "response cache",
+        "Cache the responses of the YouTrack service on disk. The cache is off, "
+        "unless a cache directory is given by --cache-dir or YT_CACHE_DIR.",
+    )
+    cache_group.add_argument(
+        "--cache-dir",
+        metavar="DIR",
+        help="Directory of the response cache (default: $YT_CACHE_DIR).",
+    )
+    cache_group.add_argument(
+        "--cache-ttl",
+        type=float,
+        default=600,
+        metavar="SECONDS",
+        help="Use cached responses this long without asking the service "
+        "(default: 600).",
+    )
+    cache_group.add_argument(
+        "--cache-size",
+        type=int,
+        default=100,
+        metavar="MB",
+        help="Maximum size of the cache, least recently used responses are "
+        "removed (default: 100).",
+    )
+    cache_group.add_argument(
+        "--no-cache", action="store_true", help="Do not use the response cache."
+    )
+    cache_group.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Revalidate or reload all cached responses and update the cache.",
+    )
     subparsers = parser.add_subparsers(
         description="Use the following commands to retrieve project names or issues "
         + "from a Youtrack service.",
@@ -42,8 +246,9 @@ def parse_arguments(args):
     )
     backup_parser.add_argument(
         "backup_dir",
+        nargs="?",
         metavar="YT_BACKUP_DIR",
-        help="The root directory to store all tickets.",
+        help="The root directory to store all tickets (not with --archive).",
     )
     backup_parser.add_argument(
         "-i",
@@ -51,6 +256,47 @@ def parse_arguments(args):
         metavar="PROJECT_ID",
         help="Project ID to backup (eg '0-42'). If omitted, all projects are saved.",
     )
+    backup_parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        metavar="N",
+        help="Number of issues to download concurrently (default: 1).",
+    )
+    backup_parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only save issues and attachments changed since the last "
+        "incremental backup.",
+    )
+    backup_parser.add_argument(
+        "--async",
+        dest="use_async",
+        action="store_true",
+        help="Use the asyncio client; with --jobs N, N requests run at once.",
+    )
+    backup_parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue an interrupted backup, skipping the projects, issues and "
+        f"attachments recorded in its {BackupJournal.filename}.",
+    )
+    backup_parser.add_argument(
+        "--format",
+        dest="export_format",
+        choices=export.formats,
+        help="Write the issues with comments and attachment metadata of each "
+        "project to files in this format, instead of markdown files and "
+        "attachments.",
+    )
+    backup_parser.add_argument(
+        "--archive",
+        metavar="FILE",
+        help="Write the backup into the archive FILE instead of a directory: "
+        + ", ".join(BackupArchive.suffixes)
+        + "; '-' writes an uncompressed tar to stdout.",
+    )
     backup_parser.set_defaults(func=backup)
     ls_parser = subparsers.add_parser(
         "ls",
@@ -73,13 +319,118 @@ def parse_arguments(args):
     ls_parser.add_argument(
         "-v", "--verbose", action="store_true", help="Display more information."
     )
+    ls_parser.add_argument(
+        "--format",
+        dest="export_format",
+        choices=export.formats,
+        help="Write the issues with comments and attachment metadata of PROJECT_ID "
+        "(or of all projects) to stdout in this format; csv only the issues.",
+    )
+    ls_parser.add_argument(
+        "--db",
+        metavar="FILE",
+        help="List from the local mirror FILE (see 'sync'), without network access.",
+    )
     ls_parser.set_defaults(func=ls)
-    return parser.parse_args(args)
+    search_parser = subparsers.add_parser(
+        "search",
+        help="Search the issues of a backup.",
+        description="List the markdown files of the issues containing all words "
+        "of QUERY in summary, description or comments, best matches first. A "
+        "word ending with '*' matches all words with that prefix.",
+    )
+    search_parser.add_argument("query", nargs="+", metavar="QUERY")
+    search_parser.add_argument(
+        "-d",
+        "--backup-dir",
+        default=os.environ.get("YT_BACKUP_DIR", "."),
+        metavar="YT_BACKUP_DIR",
+        help="The root directory of the backup (default: $YT_BACKUP_DIR or the "
+        "current directory).",
+    )
+    search_parser.add_argument(
+        "-n",
+        "--limit",
+        type=int,
+        default=20,
+        metavar="N",
+        help="Show the N best matches (default: 20).",
+    )
+    search_parser.set_defaults(func=search)
+    sync_parser = subparsers.add_parser(
+        "sync",
+        help="Update a local SQLite mirror of projects, issues and comments.",
+        description="The first run copies all issues, later runs only the issues "
+        "updated since.",
+    )
+    sync_parser.add_argument(
+        "--db", required=True, metavar="FILE", help="The SQLite database file."
+    )
+    sync_parser.add_argument(
+        "-i",
+        "--project-id",
+        metavar="PROJECT_ID",
+        help="Project ID to synchronize. If omitted, all projects are.",
+    )
+    sync_parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Copy all issues again and remove the issues deleted in YouTrack.",
+    )
+    sync_parser.set_defaults(func=sync)
+    parsed_args = parser.parse_args(args)
+    if parsed_args.func is backup:
+        if (parsed_args.backup_dir is None) == (parsed_args.archive is None):
+            backup_parser.error("give either YT_BACKUP_DIR or --archive FILE")
+        if parsed_args.archive and (
+            parsed_args.incremental
+            or parsed_args.resume
+            or parsed_args.export_format
+            or parsed_args.use_async
+        ):
+            backup_parser.error(
+                "--archive cannot be combined with --incremental, --resume, "
+                "--format or --async"
+            )
+    return parsed_args
+
+
+def configure(args):
+    """Apply the global options to the library."""
+    Issue.page_size = args.page_size
+    ytlib.max_requests_per_host = args.max_requests_per_host
+    ytlib.request_scheduler = RequestScheduler(
+        max_retries=args.retries, max_rate=args.max_rate
+    )
+    if args.pool_size > 0:
+        transport.install_connection_pool(args.pool_size)
+    else:
+        transport.uninstall_connection_pool()
+    cache_dir = args.cache_dir or os.environ.get("YT_CACHE_DIR")
+    if cache_dir and not args.no_cache:
+        ytlib.response_cache = ResponseCache(
+            cache_dir,
+            ttl=args.cache_ttl,
+            max_size=args.cache_size * 1024 * 1024,
+            refresh=args.refresh,
+        )
+    else:
+        ytlib.response_cache = None
+
+
+def report(args):
+    """Print the requested statistics to stderr."""
+    if args.connection_stats and transport.connection_pool is not None:
+        print(transport.connection_pool.stats(), file=sys.stderr)
 
 
 def main():
     args = parse_arguments(sys.argv[1:])
-    args.func(args)
+    configure(args)
+    try:
+        args.func(args)
+    finally:
+        report(args)
 
 
 def print_as_table(projects: list[Project], verbose):
@@ -100,7 +451,7 @@ def print_as_table(projects: list[Project], verbose):
                 project.project_id,
                 project.shortname,
                 project.name,
-                str(len(project.issues)),
+                str(project.issue_count),
             )
         else:
             table.add_row(project.project_id, project.shortname, project.name)
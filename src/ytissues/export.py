@@ -0,0 +1,226 @@
+"""
+Export of issues in machine-readable formats.
+
+The records are written straight from the JSON pages of the YT service, with
+comments and attachment metadata, without creating `Issue` objects or markdown
+text. Timestamps stay milliseconds since the epoch.
+
+Formats:
+    jsonl: One JSON object per issue, with the lists `comments` and
+        `attachments`.
+    csv: Comma separated values with a header line, one file each for the
+        issues, the comments and the attachments.
+    columnar: Row groups of up to `ColumnarWriter.row_group_size` rows, each one
+        line of JSON with the values of every column in one list.
+
+"""
+import csv
+import json
+from pathlib import Path
+from typing import Iterator, TextIO
+
+from ytissues.ytlib import Issue, IssueComment, Project, get_json, iter_pages
+
+formats = ("jsonl", "csv", "columnar")
+
+issue_columns = (
+    "id",
+    "idReadable",
+    "project",
+    "created",
+    "updated",
+    "resolved",
+    "summary",
+    "description",
+    "commentsCount",
+)
+comment_columns = ("id", "issue", "author", "created", "updated", "text")
+attachment_columns = (
+    "issue",
+    "name",
+    "size",
+    "mimeType",
+    "extension",
+    "charset",
+    "url",
+)
+
+
+def iter_issue_items(project_id: str, query: str = None) -> Iterator[dict]:
+    """Yield the JSON items of the issues of a project with all comments.
+
+    Args:
+        project_id: The ID of the project, for example `0-1`.
+        query: A YouTrack search query selecting the project, see
+            `Project.search_query`.
+    """
+    for json_data in iter_pages(
+        Issue.list_resource(project_id, query),
+        Issue.list_query(deep=True, query=query),
+        Issue.page_size,
+    ):
+        if isinstance(json_data, dict):
+            json_data = [json_data] if "id" in json_data else []
+        for item in json_data:
+            comments = item.get("comments")
+            if comments is None or len(comments) < item.get("commentsCount", 0):
+                item["comments"] = get_json(IssueComment.list_request(item["id"]))
+            yield item
+
+
+def issue_record(project_id: str, item: dict) -> dict:
+    """Return the issue `item` with the columns of the export formats."""
+    record = {column: item.get(column) for column in issue_columns}
+    record["project"] = project_id
+    record["comments"] = [
+        {
+            **{column: comment.get(column) for column in comment_columns},
+            "issue": item["id"],
+            "author": (comment.get("author") or {}).get("name"),
+        }
+        for comment in item.get("comments") or []
+    ]
+    record["attachments"] = [
+        {
+            **{column: attachment.get(column) for column in attachment_columns},
+            "issue": item["id"],
+        }
+        for attachment in item.get("attachments") or []
+    ]
+    return record
+
+
+class JsonlWriter:
+    """Write one JSON object per issue."""
+
+    def __init__(self, file: TextIO):
+        self.file = file
+
+    def write(self, record: dict):
+        self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def close(self):
+        pass
+
+
+class CsvWriter:
+    """Write the issues and, if files are given, comments and attachments."""
+
+    def __init__(
+        self, issues: TextIO, comments: TextIO = None, attachments: TextIO = None
+    ):
+        self.writers = []
+        for file, key, columns in (
+            (issues, None, issue_columns),
+            (comments, "comments", comment_columns),
+            (attachments, "attachments", attachment_columns),
+        ):
+            if file is not None:
+                writer = csv.writer(file)
+                writer.writerow(columns)
+                self.writers.append((writer, key, columns))
+
+    def write(self, record: dict):
+        for writer, key, columns in self.writers:
+            rows = [record] if key is None else record[key]
+            writer.writerows([row[column] for column in columns] for row in rows)
+
+    def close(self):
+        pass
+
+
+class ColumnarWriter:
+    """Write the issues, comments and attachments as tables in row groups."""
+
+    row_group_size = 10000
+
+    def __init__(self, file: TextIO):
+        self.file = file
+        self.tables = {
+            "issues": (issue_columns, {}),
+            "comments": (comment_columns, {}),
+            "attachments": (attachment_columns, {}),
+        }
+        for columns, values in self.tables.values():
+            values.update((column, []) for column in columns)
+
+    def write(self, record: dict):
+        for table, rows in (
+            ("issues", [record]),
+            ("comments", record["comments"]),
+            ("attachments", record["attachments"]),
+        ):
+            columns, values = self.tables[table]
+            for row in rows:
+                for column in columns:
+                    values[column].append(row[column])
+            if len(values[columns[0]]) >= self.row_group_size:
+                self.flush(table)
+
+    def flush(self, table: str):
+        """Write the buffered rows of `table` as one row group."""
+        columns, values = self.tables[table]
+        rows = len(values[columns[0]])
+        if rows == 0:
+            return
+        row_group = {"table": table, "rows": rows, "columns": values}
+        self.file.write(json.dumps(row_group, ensure_ascii=False) + "\n")
+        self.tables[table] = columns, {column: [] for column in columns}
+
+    def close(self):
+        for table in self.tables:
+            self.flush(table)
+
+
+def stream_writer(export_format: str, file: TextIO):
+    """Return a writer of `export_format` to `file`; csv writes the issues only."""
+    if export_format == "jsonl":
+        return JsonlWriter(file)
+    if export_format == "csv":
+        return CsvWriter(file)
+    if export_format == "columnar":
+        return ColumnarWriter(file)
+    raise ValueError(f"Unknown export format '{export_format}'")
+
+
+class ExportFiles:
+    """A writer of `export_format` to files in `directory`, as context manager."""
+
+    filenames = {
+        "jsonl": ("issues.jsonl",),
+        "csv": ("issues.csv", "comments.csv", "attachments.csv"),
+        "columnar": ("issues.columnar.jsonl",),
+    }
+
+    def __init__(self, export_format: str, directory: Path):
+        if export_format not in self.filenames:
+            raise ValueError(f"Unknown export format '{export_format}'")
+        self.paths = [directory / name for name in self.filenames[export_format]]
+        self.files = [
+            open(path, "w", encoding="utf-8", newline="") for path in self.paths
+        ]
+        if export_format == "csv":
+            self.writer = CsvWriter(*self.files)
+        else:
+            self.writer = stream_writer(export_format, self.files[0])
+
+    def __enter__(self):
+        return self.writer
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            self.writer.close()
+        finally:
+            for file in self.files:
+                file.close()
+
+
+def export_project(project: Project, writer, query: str = None) -> int:
+    """Write the issues of `project` with `writer` and return their number."""
+    count = 0
+    for item in iter_issue_items(
+        project.project_id, project.search_query(query) if query else None
+    ):
+        writer.write(issue_record(project.project_id, item))
+        count += 1
+    return count
@@ -0,0 +1,125 @@
+"""
+Incremental decoding of the JSON responses of the youtrack service.
+
+The list resources answer with one JSON array. `json.loads` needs the whole
+response, so the raw bytes, the decoded text and all decoded items are in
+memory at once before the first model object is made. `JsonStream` decodes the
+items of the array one by one with `json.JSONDecoder.raw_decode`, while the
+chunks of the response arrive, and keeps only the text not decoded yet.
+
+"""
+import codecs
+import json
+import re
+from typing import Any, Iterable, Iterator
+
+WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+_decoder = json.JSONDecoder()
+
+
+class JsonStream:
+    """The items of a JSON array read in chunks, as iterator.
+
+    If the document is no array, nothing is yielded and the decoded document
+    is in `value`. The chunks may be bytes (UTF-8) or text.
+    """
+
+    def __init__(self, chunks: Iterable[bytes | str]):
+        self.is_array = None
+        """Whether the document is an array, known when iterating started."""
+        self.value = None
+        """The document, if it is no array."""
+        self.count = 0
+        """Number of items yielded so far."""
+        self._chunks = iter(chunks)
+        self._decode = codecs.getincrementaldecoder("utf-8-sig")().decode
+        self._text = ""
+        self._pos = 0
+        self._eof = False
+
+    def __iter__(self) -> Iterator[Any]:
+        if self._peek() != "[":
+            self.is_array = False
+            self.value = self._value()
+            self._expect_end()
+            return
+        self.is_array = True
+        self._pos += 1
+        if self._peek() == "]":
+            self._pos += 1
+        else:
+            while True:
+                self._peek()
+                item = self._value()
+                self.count += 1
+                yield item
+                delimiter = self._peek()
+                self._pos += 1
+                if delimiter == "]":
+                    break
+                if delimiter != ",":
+                    raise self._error("Expecting ',' delimiter")
+        self._expect_end()
+
+    def _more(self):
+        """Read chunks until the text not decoded yet has at least doubled.
+
+        Growing the text geometrically keeps decoding a big item, which spans
+        many chunks, linear in its size.
+        """
+        rest = self._text[self._pos :]
+        parts = [rest]
+        wanted, added = max(len(rest), 1), 0
+        while added < wanted:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                parts.append(self._decode(b"", final=True))
+                self._eof = True
+                break
+            text = chunk if isinstance(chunk, str) else self._decode(chunk)
+            parts.append(text)
+            added += len(text)
+        self._text = "".join(parts)
+        self._pos = 0
+
+    def _peek(self) -> str:
+        """Skip whitespace and return the next character, "" at the end."""
+        while True:
+            self._pos = WHITESPACE.match(self._text, self._pos).end()
+            if self._pos < len(self._text):
+                return self._text[self._pos]
+            if self._eof:
+                return ""
+            self._more()
+
+    def _value(self) -> Any:
+        """Decode the value at the current position.
+
+        A value ending with the text read so far is only taken at the end of
+        the document, as a number could go on in the next chunk.
+        """
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self._text, self._pos)
+                if end < len(self._text) or self._eof:
+                    self._pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+            self._more()
+
+    def _expect_end(self):
+        if self._peek():
+            raise self._error("Extra data")
+
+    def _error(self, message: str) -> json.JSONDecodeError:
+        return json.JSONDecodeError(message, self._text, self._pos)
+
+
+def iter_chunks(data: bytes, chunk_size: int) -> Iterator[memoryview]:
+    """Yield `data` in chunks of `chunk_size` bytes, without copying."""
+    view = memoryview(data)
+    for start in range(0, len(view), chunk_size):
+        yield view[start : start + chunk_size]
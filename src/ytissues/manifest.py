@@ -0,0 +1,341 @@
+"""
+Manifest of an incremental backup.
+
+The manifest is stored as JSON file in the backup directory of a project. It
+remembers the `updated` timestamp of every saved issue and size and SHA-256
+hash of every saved attachment, so that the next incremental backup only
+requests and writes what changed since.
+
+The `BackupJournal` in the root directory of a backup records the completed
+projects, issues and attachments of a running backup, so that `yt backup
+--resume` continues a backup that was interrupted.
+
+"""
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from urllib import parse
+
+
+def timestamp(moment: datetime | None) -> int | None:
+    """Return `moment` in milliseconds since the epoch, like the YT service."""
+    return None if moment is None else round(moment.timestamp() * 1000)
+
+
+def attachment_key(url: str) -> str:
+    """Return the url of an attachment without the (changing) signature."""
+    return parse.urlsplit(url).path
+
+
+def updated_query(last_sync: int | None, margin: timedelta) -> str | None:
+    """Return a YouTrack query for issues updated since `last_sync` - `margin`.
+
+    Args:
+        last_sync: The latest `updated` timestamp (ms) seen, None if nothing
+            was synchronized yet; then there is no query.
+        margin: To be safe from differing timezones of the YT service and
+            the local host.
+    """
+    if last_sync is None:
+        return None
+    since = datetime.fromtimestamp(last_sync / 1000) - margin
+    return f"updated: {since.strftime('%Y-%m-%dT%H:%M:%S')} .. *"
+
+
+class BackupManifest:
+    """Issues and attachments saved by the last backup of one project.
+
+    The methods may be called from several threads at once.
+    """
+
+    filename = ".yt-manifest.json"
+    sync_margin = timedelta(days=1)
+    """Issues updated this long before the last sync are requested again, to
+    be safe from differing timezones of the YT service and the local host."""
+
+    def __init__(
+        self,
+        path: Path,
+        last_sync: int = None,
+        issues: dict = None,
+        attachments: dict = None,
+    ):
+        self.path = path
+        self.last_sync = last_sync
+        self.issues = issues or {}
+        self.attachments = attachments or {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def load(project_path: Path) -> "BackupManifest":
+        """Return the manifest in `project_path` or an empty one."""
+        path = project_path / BackupManifest.filename
+        try:
+            json_data = json.loads(path.read_text())
+        except FileNotFoundError:
+            return BackupManifest(path)
+        return BackupManifest(
+            path,
+            last_sync=json_data["last_sync"],
+            issues=json_data["issues"],
+            attachments=json_data["attachments"],
+        )
+
+    def save(self):
+        """Write the manifest, replacing the old one only when complete."""
+        with self._lock:
+            json_data = {
+                "last_sync": self.last_sync,
+                "issues": self.issues,
+                "attachments": self.attachments,
+            }
+        temp_path = self.path.with_name(self.path.name + ".tmp")
+        temp_path.write_text(json.dumps(json_data, indent=1, sort_keys=True))
+        os.replace(temp_path, self.path)
+
+    def updated_query(self) -> str | None:
+        """Return a YouTrack query for issues updated since the last sync."""
+        return updated_query(self.last_sync, self.sync_margin)
+
+    def is_unchanged(self, issue) -> bool:
+        """Return True, if `issue` was saved with the same `updated` timestamp."""
+        with self._lock:
+            saved = self.issues.get(issue.issue_id)
+        return saved is not None and saved == timestamp(issue.updated)
+
+    def issue_saved(self, issue):
+        updated = timestamp(issue.updated)
+        with self._lock:
+            self.issues[issue.issue_id] = updated
+            if updated is not None and (
+                self.last_sync is None or updated > self.last_sync
+            ):
+                self.last_sync = updated
+
+    def is_attachment_unchanged(self, attachment, save_file: Path) -> bool:
+        """Return True, if `save_file` is the saved version of `attachment`."""
+        with self._lock:
+            saved = self.attachments.get(attachment_key(attachment.url))
+        if saved is None or saved["size"] != attachment.size:
+            return False
+        try:
+            return save_file.stat().st_size == attachment.size
+        except FileNotFoundError:
+            return False
+
+    def attachment_saved(self, attachment, sha256: str):
+        with self._lock:
+            self.attachments[attachment_key(attachment.url)] = {
+                "size": attachment.size,
+                "sha256": sha256,
+            }
+
+
+def link_file(source: Path, target: Path) -> bool:
+    """Replace `target` by a hard link to `source`.
+
+    Returns:
+        False, if the filesystem does not support the link; `target` is then
+        unchanged.
+    """
+    temp_path = target.with_name(target.name + ".link")
+    try:
+        temp_path.unlink(missing_ok=True)
+        os.link(source, temp_path)
+    except OSError:
+        return False
+    os.replace(temp_path, target)
+    return True
+
+
+class AttachmentIndex:
+    """All attachment files of a backup with size, hash and modification time.
+
+    The index is stored in the root directory of the backup and shared by all
+    projects. It is used to skip downloads of attachments, which are already
+    on disk unchanged, and to store identical attachments only once (as hard
+    links). The methods may be called from several threads at once.
+    """
+
+    filename = ".yt-attachments.json"
+
+    def __init__(self, path: Path, entries: dict = None):
+        self.path = path
+        self.entries = entries or {}
+        self._by_hash = {entry["sha256"]: key for key, entry in self.entries.items()}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def load(backup_path: Path) -> "AttachmentIndex":
+        """Return the index in `backup_path` or an empty one."""
+        path = backup_path / AttachmentIndex.filename
+        try:
+            entries = json.loads(path.read_text())
+        except FileNotFoundError:
+            entries = {}
+        return AttachmentIndex(path, entries)
+
+    def save(self):
+        with self._lock:
+            text = json.dumps(self.entries, indent=1, sort_keys=True)
+        temp_path = self.path.with_name(self.path.name + ".tmp")
+        temp_path.write_text(text)
+        os.replace(temp_path, self.path)
+
+    def _valid_file(self, entry: dict | None) -> Path | None:
+        """Return the path of `entry`, if the file is unchanged since indexed."""
+        if entry is None:
+            return None
+        path = self.path.parent / entry["path"]
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return None
+        if stat.st_size != entry["size"] or stat.st_mtime_ns != entry["mtime"]:
+            return None
+        return path
+
+    def lookup(self, attachment) -> tuple[Path, str] | None:
+        """Return path and SHA-256 of a saved, unchanged copy of `attachment`."""
+        with self._lock:
+            entry = self.entries.get(attachment_key(attachment.url))
+        path = self._valid_file(entry)
+        if path is None or entry["size"] != attachment.size:
+            return None
+        return path, entry["sha256"]
+
+    def find_duplicate(self, sha256: str, save_file: Path) -> Path | None:
+        """Return another saved file with the same content as `save_file`."""
+        with self._lock:
+            entry = self.entries.get(self._by_hash.get(sha256))
+        path = self._valid_file(entry)
+        if path is None or path == save_file:
+            return None
+        return path
+
+    def add(self, attachment, save_file: Path, sha256: str):
+        stat = save_file.stat()
+        key = attachment_key(attachment.url)
+        with self._lock:
+            self.entries[key] = {
+                "path": str(save_file.relative_to(self.path.parent)),
+                "size": stat.st_size,
+                "sha256": sha256,
+                "mtime": stat.st_mtime_ns,
+            }
+            self._by_hash.setdefault(sha256, key)
+
+
+class BackupJournal:
+    """Append-only record of the completed work of one backup run.
+
+    Every entry is written as one line of JSON and synced to disk at once, so
+    the journal survives a crash or kill of the backup. A truncated last line
+    is ignored when the journal is loaded. Used as context manager, the
+    journal is removed when the backup completes without error. The methods
+    may be called from several threads at once.
+    """
+
+    filename = ".yt-journal.jsonl"
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.projects = set()
+        self.issues = set()
+        self.attachments = {}
+        self._file = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def open(backup_path: Path, resume: bool = False) -> "BackupJournal":
+        """Return a new journal in `backup_path`, or continue the old one.
+
+        Args:
+            backup_path: The root directory of the backup.
+            resume: Keep the entries of an interrupted backup.
+        """
+        backup_path.mkdir(parents=True, exist_ok=True)
+        journal = BackupJournal(backup_path / BackupJournal.filename)
+        if resume:
+            journal._read()
+        mode = "a" if resume else "w"
+        journal._file = open(journal.path, mode, encoding="utf-8")
+        return journal
+
+    def _read(self):
+        try:
+            lines = self.path.read_text(encoding="utf-8").splitlines()
+        except FileNotFoundError:
+            return
+        for line in lines:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if "project" in entry:
+                self.projects.add(entry["project"])
+            elif "issue" in entry:
+                self.issues.add(entry["issue"])
+            elif "attachment" in entry:
+                self.attachments[entry["attachment"]] = entry
+
+    def _write(self, entry: dict):
+        with self._lock:
+            self._file.write(json.dumps(entry) + "\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def is_project_done(self, project_id: str) -> bool:
+        return project_id in self.projects
+
+    def project_done(self, project_id: str):
+        self._write({"project": project_id})
+        with self._lock:
+            self.projects.add(project_id)
+
+    def is_issue_done(self, issue_id: str) -> bool:
+        with self._lock:
+            return issue_id in self.issues
+
+    def issue_done(self, issue_id: str):
+        self._write({"issue": issue_id})
+        with self._lock:
+            self.issues.add(issue_id)
+
+    def saved_attachment(self, attachment, save_file: Path) -> str | None:
+        """Return the SHA-256 of `attachment`, if saved to `save_file` before."""
+        with self._lock:
+            entry = self.attachments.get(attachment_key(attachment.url))
+        if entry is None or entry["size"] != attachment.size:
+            return None
+        try:
+            if save_file.stat().st_size != attachment.size:
+                return None
+        except FileNotFoundError:
+            return None
+        return entry["sha256"]
+
+    def attachment_done(self, attachment, sha256: str):
+        entry = {
+            "attachment": attachment_key(attachment.url),
+            "size": attachment.size,
+            "sha256": sha256,
+        }
+        self._write(entry)
+        with self._lock:
+            self.attachments[entry["attachment"]] = entry
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        if exc_type is None:
+            self.path.unlink(missing_ok=True)
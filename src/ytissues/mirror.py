@@ -0,0 +1,264 @@
+"""
+Local SQLite mirror of the YT service.
+
+`yt sync --db FILE` copies projects, issues, comments and attachment metadata
+into an SQLite database, after the first run only the issues updated since
+the last sync. The issues are indexed by project and date, and summary,
+description and comment texts are searchable with FTS5. `yt ls --db FILE`
+lists from the mirror without network access.
+
+"""
+import sqlite3
+from datetime import timedelta
+from pathlib import Path
+
+from ytissues.export import comment_columns, issue_record, iter_issue_items
+from ytissues.manifest import attachment_key, updated_query
+from ytissues.ytlib import IssueTable, Project
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS projects (
+    id TEXT PRIMARY KEY,
+    short_name TEXT,
+    name TEXT,
+    last_sync INTEGER
+);
+CREATE TABLE IF NOT EXISTS issues (
+    id TEXT PRIMARY KEY,
+    project_id TEXT NOT NULL,
+    id_readable TEXT,
+    created INTEGER,
+    updated INTEGER,
+    resolved INTEGER,
+    summary TEXT,
+    description TEXT,
+    comments_count INTEGER
+);
+CREATE INDEX IF NOT EXISTS issues_created ON issues (project_id, created);
+CREATE INDEX IF NOT EXISTS issues_updated ON issues (project_id, updated);
+CREATE INDEX IF NOT EXISTS issues_resolved ON issues (project_id, resolved);
+CREATE TABLE IF NOT EXISTS comments (
+    id TEXT PRIMARY KEY,
+    issue_id TEXT NOT NULL,
+    author TEXT,
+    created INTEGER,
+    updated INTEGER,
+    text TEXT
+);
+CREATE INDEX IF NOT EXISTS comments_issue ON comments (issue_id);
+CREATE TABLE IF NOT EXISTS attachments (
+    issue_id TEXT NOT NULL,
+    key TEXT NOT NULL,
+    name TEXT,
+    size INTEGER,
+    mime_type TEXT,
+    extension TEXT,
+    charset TEXT,
+    url TEXT,
+    PRIMARY KEY (issue_id, key)
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS issues_fts USING fts5 (
+    summary, description, comments
+);
+"""
+
+
+class Mirror:
+    """An SQLite database with the data of the YT service, as context manager.
+
+    The rows of `issues_fts` have the rowid of their row in `issues`.
+    """
+
+    sync_margin = timedelta(days=1)
+    """See `BackupManifest.sync_margin`."""
+
+    commit_interval = 100
+    """Number of issues written per transaction while synchronizing."""
+
+    def __init__(self, path: Path | str):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def sync(self, project: Project, full: bool = False) -> int:
+        """Copy the issues of `project` updated since the last sync.
+
+        Args:
+            project: The project to synchronize.
+            full: Copy all issues and remove those deleted from the service.
+
+        Returns:
+            The number of issues copied.
+        """
+        self.save_project(project)
+        last_sync = None if full else self.last_sync(project.project_id)
+        query = updated_query(last_sync, self.sync_margin)
+        seen, latest = set(), last_sync
+        for item in iter_issue_items(
+            project.project_id, project.search_query(query) if query else None
+        ):
+            self.save_issue(issue_record(project.project_id, item))
+            seen.add(item["id"])
+            if item.get("updated") is not None:
+                latest = max(latest or 0, item["updated"])
+            if len(seen) % self.commit_interval == 0:
+                self.connection.commit()
+        with self.connection:
+            if full:
+                self.delete_other_issues(project.project_id, seen)
+            self.connection.execute(
+                "UPDATE projects SET last_sync = ? WHERE id = ?",
+                (latest, project.project_id),
+            )
+        return len(seen)
+
+    def last_sync(self, project_id: str) -> int | None:
+        row = self.connection.execute(
+            "SELECT last_sync FROM projects WHERE id = ?", (project_id,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def save_project(self, project: Project):
+        with self.connection:
+            self.connection.execute(
+                "INSERT INTO projects (id, short_name, name) VALUES (?, ?, ?) "
+                "ON CONFLICT (id) DO UPDATE "
+                "SET short_name = excluded.short_name, name = excluded.name",
+                (project.project_id, project.shortname, project.name),
+            )
+
+    def save_issue(self, record: dict):
+        """Insert or replace an issue with comments and attachments.
+
+        Args:
+            record: The issue as returned by `export.issue_record`.
+        """
+        execute = self.connection.execute
+        rowid = execute(
+            "INSERT INTO issues VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (id) DO UPDATE SET project_id = excluded.project_id, "
+            "id_readable = excluded.id_readable, created = excluded.created, "
+            "updated = excluded.updated, resolved = excluded.resolved, "
+            "summary = excluded.summary, description = excluded.description, "
+            "comments_count = excluded.comments_count "
+            "RETURNING rowid",
+            (
+                record["id"],
+                record["project"],
+                record["idReadable"],
+                record["created"],
+                record["updated"],
+                record["resolved"],
+                record["summary"],
+                record["description"],
+                record["commentsCount"],
+            ),
+        ).fetchone()[0]
+        execute("DELETE FROM comments WHERE issue_id = ?", (record["id"],))
+        execute("DELETE FROM attachments WHERE issue_id = ?", (record["id"],))
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO comments VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                tuple(comment[column] for column in comment_columns)
+                for comment in record["comments"]
+            ],
+        )
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO attachments VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    attachment["issue"],
+                    attachment_key(attachment["url"] or attachment["name"]),
+                    attachment["name"],
+                    attachment["size"],
+                    attachment["mimeType"],
+                    attachment["extension"],
+                    attachment["charset"],
+                    attachment["url"],
+                )
+                for attachment in record["attachments"]
+            ],
+        )
+        execute("DELETE FROM issues_fts WHERE rowid = ?", (rowid,))
+        execute(
+            "INSERT INTO issues_fts (rowid, summary, description, comments) "
+            "VALUES (?, ?, ?, ?)",
+            (
+                rowid,
+                record["summary"],
+                record["description"],
+                "\n".join(comment["text"] or "" for comment in record["comments"]),
+            ),
+        )
+
+    def delete_other_issues(self, project_id: str, issue_ids: set[str]):
+        """Delete the issues of a project, which are not in `issue_ids`."""
+        rows = self.connection.execute(
+            "SELECT rowid, id FROM issues WHERE project_id = ?", (project_id,)
+        ).fetchall()
+        for rowid, issue_id in rows:
+            if issue_id not in issue_ids:
+                self.connection.execute("DELETE FROM issues WHERE rowid = ?", (rowid,))
+                self.connection.execute(
+                    "DELETE FROM issues_fts WHERE rowid = ?", (rowid,)
+                )
+                for table in ("comments", "attachments"):
+                    self.connection.execute(
+                        f"DELETE FROM {table} WHERE issue_id = ?", (issue_id,)
+                    )
+
+    def projects(self, project_id: str = None) -> list[Project]:
+        """Return all projects (or the one with `project_id`) with issue counts."""
+        rows = self.connection.execute(
+            "SELECT projects.id, short_name, name, count(issues.id) "
+            "FROM projects LEFT JOIN issues ON issues.project_id = projects.id "
+            "WHERE ?1 IS NULL OR projects.id = ?1 "
+            "GROUP BY projects.id ORDER BY projects.rowid",
+            (project_id,),
+        ).fetchall()
+        projects = []
+        for row_id, short_name, name, issue_count in rows:
+            project = Project(row_id, short_name, name)
+            project._issue_count = issue_count
+            projects.append(project)
+        return projects
+
+    def get_project(self, project_id: str) -> Project:
+        projects = self.projects(project_id)
+        if len(projects) != 1:
+            raise ValueError(f"Project with ID '{project_id}' not in {self.path}!")
+        return projects[0]
+
+    def issue_table(
+        self, project_id: str, unresolved: bool = False, updated_since: int = None
+    ) -> IssueTable:
+        """Return the issues of a project, filtered with the indexes.
+
+        Args:
+            project_id: The ID of the project, for example `0-1`.
+            unresolved: Only the unresolved issues.
+            updated_since: Only the issues updated since this timestamp (ms).
+        """
+        sql = (
+            "SELECT id, id_readable, created, updated, resolved, summary, "
+            "comments_count FROM issues WHERE project_id = ?"
+        )
+        parameters = [project_id]
+        if unresolved:
+            sql += " AND resolved IS NULL"
+        if updated_since is not None:
+            sql += " AND updated >= ?"
+            parameters.append(updated_since)
+        table = IssueTable()
+        for row in self.connection.execute(sql + " ORDER BY rowid", parameters):
+            table.append(*row)
+        return table
@@ -0,0 +1,121 @@
+"""
+Streaming output of tables.
+
+A rich `Table` is laid out only when it is complete, so all rows are kept in
+memory and nothing is shown before the last one is known. `StreamingTable`
+instead prints each row at once, in fixed column widths, with the rounded
+box of the rich tables used elsewhere.
+
+"""
+import shutil
+import sys
+import textwrap
+from dataclasses import dataclass
+from typing import Iterable, TextIO
+
+
+@dataclass
+class Column:
+    """A column of a `StreamingTable`.
+
+    Longer values than `width` are cut, except in the column with `width`
+    None, which gets the remaining width of the terminal and wraps its values.
+    """
+
+    header: str
+    width: int | None = None
+    justify: str = "left"
+
+    def align(self, text: str, width: int) -> str:
+        if len(text) > width:
+            text = text[: width - 1] + "…"
+        if self.justify == "right":
+            return text.rjust(width)
+        if self.justify == "center":
+            return text.center(width)
+        return text.ljust(width)
+
+
+class StreamingTable:
+    """Print a table row by row in constant memory.
+
+    The title and the header are printed with the first rows (or the footer),
+    so that nothing is printed, if getting the first rows fails.
+    """
+
+    min_width = 20
+    """Minimum width of the wrapping column."""
+
+    def __init__(
+        self,
+        columns: list[Column],
+        title: str = None,
+        file: TextIO = None,
+        width: int = None,
+    ):
+        """
+        Args:
+            columns: The columns of the table, at most one with width None.
+            title: Printed centered above the table.
+            file: Print to this file (default: stdout at the time of printing).
+            width: Width of the table (default: the width of the terminal).
+        """
+        self.columns = columns
+        self.title = title
+        self.file = file
+        if width is None:
+            width = shutil.get_terminal_size().columns
+        fixed = sum(column.width or 0 for column in columns)
+        remaining = width - fixed - 3 * len(columns) - 1
+        self.widths = [
+            column.width or max(self.min_width, remaining) for column in columns
+        ]
+        self.width = sum(self.widths) + 3 * len(columns) + 1
+        self.rows = 0
+        self._header_printed = False
+
+    def write(self, text: str):
+        (self.file or sys.stdout).write(text)
+
+    def rule(self, left: str, middle: str, right: str) -> str:
+        return left + middle.join("─" * (width + 2) for width in self.widths) + right
+
+    def line(self, cells: list[str]) -> str:
+        return "".join(f"│ {cell} " for cell in cells) + "│"
+
+    def print_header(self):
+        self._header_printed = True
+        if self.title:
+            self.write(self.title.center(self.width).rstrip() + "\n")
+        self.write(self.rule("╭", "┬", "╮") + "\n")
+        headers = [
+            column.align(column.header, width)
+            for column, width in zip(self.columns, self.widths)
+        ]
+        self.write(self.line(headers) + "\n")
+        self.write(self.rule("├", "┼", "┤") + "\n")
+
+    def print_rows(self, rows: Iterable[list[str]]):
+        """Print `rows` and flush the output, so that they are shown at once."""
+        for row in rows:
+            if not self._header_printed:
+                self.print_header()
+            lines = [
+                textwrap.wrap(value, width) or [""] if column.width is None else [value]
+                for column, width, value in zip(self.columns, self.widths, row)
+            ]
+            for number in range(max(map(len, lines))):
+                cells = [
+                    column.align(cell[number] if number < len(cell) else "", width)
+                    for column, width, cell in zip(self.columns, self.widths, lines)
+                ]
+                self.write(self.line(cells) + "\n")
+            self.rows += 1
+        (self.file or sys.stdout).flush()
+
+    def print_footer(self, caption: str = None):
+        if not self._header_printed:
+            self.print_header()
+        self.write(self.rule("╰", "┴", "╯") + "\n")
+        if caption:
+            self.write(caption.center(self.width).rstrip() + "\n")
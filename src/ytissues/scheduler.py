@@ -0,0 +1,169 @@
+"""
+Retries and adaptive rate limiting for the requests to the youtrack service.
+
+A `RequestScheduler` retries requests answered with 429 (Too Many Requests) or
+a transient server error, waiting as long as `Retry-After` asks for, or with
+exponential backoff and jitter. Throttling responses also halve the request
+rate of all threads; every successful request raises it again a little
+(additive increase, multiplicative decrease), so that the scheduler settles
+near the highest rate the service accepts.
+
+"""
+import random
+import threading
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Callable
+from urllib.error import HTTPError, URLError
+
+
+def retry_after_seconds(value: str | None) -> float | None:
+    """Return the delay of a `Retry-After` header (seconds or HTTP date)."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RequestScheduler:
+    """Pace, retry and throttle requests of all threads.
+
+    The methods may be called from several threads at once.
+    """
+
+    retry_statuses = {429, 500, 502, 503, 504}
+    throttle_statuses = {429, 503}
+    initial_rate = 8.0
+    """Rate assumed when throttled before the rate of requests is known."""
+
+    def __init__(
+        self,
+        max_retries: int = 5,
+        backoff: float = 1.0,
+        max_backoff: float = 60.0,
+        max_rate: float = None,
+        min_rate: float = 0.2,
+        rate_increase: float = 1.0,
+    ):
+        """
+        Args:
+            max_retries: Number of retries of a failed request.
+            backoff: Delay before the first retry in seconds, doubled per retry.
+            max_backoff: Maximum delay between two retries in seconds.
+            max_rate: Maximum number of requests per second (default: no limit).
+            min_rate: The rate is never throttled below this.
+            rate_increase: Requests per second the rate grows per second of
+                successful requests, after it was throttled.
+        """
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_rate = max_rate
+        self.min_rate = min_rate
+        self.rate_increase = rate_increase
+        self.rate = max_rate
+        self.retries = 0
+        self.throttled = 0
+        self.clock = time.monotonic
+        self.sleep = time.sleep
+        self._next_start = 0.0
+        self._starts = deque(maxlen=32)
+        self._lock = threading.Lock()
+
+    def wait_turn(self):
+        """Sleep until the next request may start at the current rate."""
+        with self._lock:
+            now = self.clock()
+            start = max(now, self._next_start)
+            if self.rate is not None:
+                self._next_start = start + 1 / self.rate
+            self._starts.append(start)
+        if start > now:
+            self.sleep(start - now)
+
+    def observed_rate(self) -> float | None:
+        """Return the rate of the recent requests per second."""
+        with self._lock:
+            if len(self._starts) < 2:
+                return None
+            duration = self._starts[-1] - self._starts[0]
+            return (len(self._starts) - 1) / duration if duration > 0 else None
+
+    def on_success(self):
+        with self._lock:
+            if self.rate is None:
+                return
+            self.rate += self.rate_increase / self.rate
+            if self.max_rate is not None:
+                self.rate = min(self.rate, self.max_rate)
+
+    def on_throttle(self, delay: float):
+        """Halve the rate and let all requests wait `delay` seconds."""
+        observed = self.observed_rate()
+        with self._lock:
+            self.throttled += 1
+            rate = self.rate or observed or self.initial_rate
+            self.rate = max(self.min_rate, rate / 2)
+            self._next_start = max(self._next_start, self.clock() + delay)
+
+    def delay(self, attempt: int, retry_after: float = None) -> float:
+        """Return the delay before retry number `attempt` (starting at 0)."""
+        if retry_after is not None:
+            return retry_after
+        limit = min(self.max_backoff, self.backoff * 2**attempt)
+        return limit / 2 + random.uniform(0, limit / 2)
+
+    def call(self, open_response: Callable):
+        """Return the response of `open_response()`, retrying failures.
+
+        `open_response` must send the request again on every call. After the
+        last retry, the last error is raised or the last response returned.
+        """
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+            self.wait_turn()
+            try:
+                response = open_response()
+            except HTTPError as err:
+                if err.code not in self.retry_statuses or last_attempt:
+                    raise
+                err.close()
+                self.retry(err.code, attempt, err.headers.get("Retry-After"))
+                continue
+            except (URLError, ConnectionError, TimeoutError):
+                if last_attempt:
+                    raise
+                self.retry(None, attempt)
+                continue
+            status = response.getcode()
+            if status in self.retry_statuses and not last_attempt:
+                headers = getattr(response, "headers", {})
+                if hasattr(response, "close"):
+                    response.close()
+                self.retry(status, attempt, headers.get("Retry-After"))
+                continue
+            self.on_success()
+            return response
+
+    def retry(self, status: int | None, attempt: int, retry_after: str = None):
+        delay = self.delay(attempt, retry_after_seconds(retry_after))
+        with self._lock:
+            self.retries += 1
+        if status in self.throttle_statuses:
+            self.on_throttle(delay)
+        else:
+            self.sleep(delay)
+
+    def stats(self) -> str:
+        rate = "unlimited" if self.rate is None else f"{self.rate:.1f} requests/s"
+        return (
+            f"Requests: {self.retries} retries, throttled {self.throttled} times, "
+            f"rate {rate}."
+        )
@@ -0,0 +1,121 @@
+"""
+Full-text search in a backup.
+
+Every issue saved by `yt backup` is added to an SQLite FTS5 index in the root
+directory of the backup, with its summary, description and comment texts.
+`yt search QUERY` ranks the matching issues with BM25 and prints the paths of
+their markdown files, without reading the files.
+
+"""
+import sqlite3
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS issues (
+    id TEXT PRIMARY KEY,
+    id_readable TEXT,
+    path TEXT
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS issues_fts USING fts5 (
+    summary, description, comments
+);
+"""
+
+
+@dataclass
+class SearchResult:
+    issue_id: str
+    id_readable: str
+    path: str
+    snippet: str
+    score: float
+
+
+def fts_query(query: str) -> str:
+    """Return `query` as FTS5 query, all words required.
+
+    The words are quoted, so that punctuation is no FTS5 syntax; a trailing
+    `*` searches for words with that prefix.
+    """
+    terms = []
+    for word in query.split():
+        prefix = word.endswith("*")
+        word = word.rstrip("*").replace('"', '""')
+        if word:
+            terms.append(f'"{word}"' + ("*" if prefix else ""))
+    return " ".join(terms)
+
+
+class SearchIndex:
+    """The search index of a backup, as context manager.
+
+    The rows of `issues_fts` have the rowid of their row in `issues`. The
+    methods may be called from several threads at once.
+    """
+
+    filename = ".yt-search.sqlite"
+    weights = (10.0, 4.0, 1.0)
+    """BM25 weights of summary, description and comments."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def open(backup_path: Path) -> "SearchIndex":
+        """Return the search index in the root directory `backup_path`."""
+        backup_path.mkdir(parents=True, exist_ok=True)
+        return SearchIndex(backup_path / SearchIndex.filename)
+
+    def add(self, issue, markdown_file: Path):
+        """Add or replace `issue`, saved as `markdown_file`."""
+        comments = "\n".join(comment.text for comment in issue.comments)
+        path = str(markdown_file.relative_to(self.path.parent))
+        with self._lock:
+            execute = self.connection.execute
+            rowid = execute(
+                "INSERT INTO issues VALUES (?, ?, ?) ON CONFLICT (id) DO UPDATE "
+                "SET id_readable = excluded.id_readable, path = excluded.path "
+                "RETURNING rowid",
+                (issue.issue_id, issue.id_readable, path),
+            ).fetchone()[0]
+            execute("DELETE FROM issues_fts WHERE rowid = ?", (rowid,))
+            execute(
+                "INSERT INTO issues_fts (rowid, summary, description, comments) "
+                "VALUES (?, ?, ?, ?)",
+                (rowid, issue.summary, issue.description, comments),
+            )
+
+    def commit(self):
+        with self._lock:
+            self.connection.commit()
+
+    def search(self, query: str, limit: int = 20) -> list[SearchResult]:
+        """Return the best `limit` issues matching all words of `query`."""
+        fts = fts_query(query)
+        if not fts:
+            return []
+        with self._lock:
+            rows = self.connection.execute(
+                "SELECT issues.id, id_readable, path, "
+                "snippet(issues_fts, -1, '[', ']', '…', 12), "
+                "bm25(issues_fts, ?, ?, ?) AS score "
+                "FROM issues_fts JOIN issues ON issues.rowid = issues_fts.rowid "
+                "WHERE issues_fts MATCH ? ORDER BY score LIMIT ?",
+                (*self.weights, fts, limit),
+            ).fetchall()
+        return [SearchResult(*row) for row in rows]
+
+    def close(self):
+        self.commit()
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
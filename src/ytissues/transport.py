@@ -0,0 +1,197 @@
+"""
+HTTP transport with persistent connections for the requests to the youtrack service.
+
+`urllib.request` opens a new connection (and does a new TLS handshake) for
+every request and closes it after the response. The `KeepAliveHandler` keeps
+the connections open and reuses them from a `ConnectionPool`. Once installed
+with `install_connection_pool`, all calls of `urllib.request.urlopen` use the
+pool.
+
+"""
+import http.client
+import threading
+from urllib import request
+from urllib.error import URLError
+
+
+class ConnectionPool:
+    """Idle HTTP(S) connections per scheme and host, ready for reuse.
+
+    At most `pool_size` idle connections are kept per host, more connections
+    are closed when they are released.
+    """
+
+    def __init__(self, pool_size: int = 8):
+        if pool_size < 1:
+            raise ValueError(f"Pool size must be positive: {pool_size}")
+        self.pool_size = pool_size
+        self.created = 0
+        self.reused = 0
+        self._idle: dict[tuple[str, str], list[http.client.HTTPConnection]] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, key: tuple[str, str], factory) -> tuple:
+        """Return an idle connection for `key` or a new one from `factory()`.
+
+        Returns:
+            A tuple (connection, reused).
+        """
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                self.reused += 1
+                return idle.pop(), True
+            self.created += 1
+        return factory(), False
+
+    def release(self, key: tuple[str, str], connection: http.client.HTTPConnection):
+        """Return `connection` into the pool after its response was read."""
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.pool_size:
+                idle.append(connection)
+                return
+        connection.close()
+
+    def close(self):
+        """Close all idle connections."""
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for connection in connections:
+                connection.close()
+
+    @property
+    def requests(self) -> int:
+        return self.created + self.reused
+
+    def stats(self) -> str:
+        """Return a line with the numbers of opened and reused connections."""
+        if self.requests == 0:
+            return "HTTP connections: no requests."
+        return (
+            f"HTTP connections: {self.created} opened, {self.reused} reused "
+            f"({100 * self.reused / self.requests:.0f}% of {self.requests} requests)."
+        )
+
+
+class PooledResponse(http.client.HTTPResponse):
+    """Response that hands its connection back to the pool when it is read.
+
+    The connection is only reused if the body was read to the end and the
+    server did not ask to close the connection.
+    """
+
+    on_release = None
+
+    def close(self):
+        if self.fp is not None:  # the body was not read to the end
+            self.will_close = True
+        super().close()
+
+    def _close_conn(self):
+        super()._close_conn()
+        if self.on_release is not None:
+            on_release, self.on_release = self.on_release, None
+            on_release(not self.will_close)
+
+
+class KeepAliveHandler(request.HTTPHandler, request.HTTPSHandler):
+    """Open http and https urls with persistent connections from a pool."""
+
+    def __init__(self, pool: ConnectionPool, context=None):
+        super().__init__(context=context)
+        self.pool = pool
+
+    def http_open(self, req: request.Request):
+        return self.pooled_open(http.client.HTTPConnection, req)
+
+    def https_open(self, req: request.Request):
+        if req._tunnel_host:  # no pooling through proxy tunnels
+            return super().https_open(req)
+        return self.pooled_open(http.client.HTTPSConnection, req, context=self._context)
+
+    def pooled_open(self, http_class, req: request.Request, **http_conn_args):
+        """Send `req` over a pooled connection, like `do_open` with keep-alive.
+
+        A reused connection may have been closed by the server in the meantime.
+        In that case, the request is sent again over a new connection.
+        """
+        host = req.host
+        if not host:
+            raise URLError("no host given")
+        key = (req.type, host)
+
+        headers = dict(req.unredirected_hdrs)
+        headers.update({k: v for k, v in req.headers.items() if k not in headers})
+        headers["Connection"] = "keep-alive"
+        headers = {name.title(): val for name, val in headers.items()}
+
+        def new_connection():
+            connection = http_class(host, timeout=req.timeout, **http_conn_args)
+            connection.set_debuglevel(self._debuglevel)
+            connection.response_class = PooledResponse
+            return connection
+
+        while True:
+            connection, reused = self.pool.acquire(key, new_connection)
+            try:
+                connection.request(
+                    req.get_method(),
+                    req.selector,
+                    req.data,
+                    headers,
+                    encode_chunked=req.has_header("Transfer-encoding"),
+                )
+                response = connection.getresponse()
+            except (OSError, http.client.HTTPException) as err:
+                connection.close()
+                if reused and req.get_method() in ("GET", "HEAD"):
+                    continue  # stale connection, try again
+                if isinstance(err, OSError):
+                    raise URLError(err)
+                raise
+            except BaseException:
+                connection.close()
+                raise
+            break
+
+        def release(reusable: bool):
+            if reusable:
+                self.pool.release(key, connection)
+            else:
+                connection.close()
+
+        response.on_release = release
+        response.url = req.get_full_url()
+        response.msg = response.reason
+        return response
+
+
+connection_pool: ConnectionPool | None = None
+"""The pool used by `urllib.request.urlopen`, if installed."""
+
+
+def install_connection_pool(pool_size: int = 8) -> ConnectionPool:
+    """Let `urllib.request.urlopen` use a new pool of persistent connections.
+
+    Args:
+        pool_size: Maximum number of idle connections kept per host.
+
+    Returns:
+        The installed pool, for example to read its statistics.
+    """
+    global connection_pool
+    uninstall_connection_pool()
+    connection_pool = ConnectionPool(pool_size)
+    request.install_opener(request.build_opener(KeepAliveHandler(connection_pool)))
+    return connection_pool
+
+
+def uninstall_connection_pool():
+    """Close the pool and let `urllib.request.urlopen` use its default opener."""
+    global connection_pool
+    if connection_pool is not None:
+        connection_pool.close()
+        connection_pool = None
+    request.install_opener(None)
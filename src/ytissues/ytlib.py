@@ -4,17 +4,37 @@ Library for retrieving issues from the youtrack service.
 Get data from https://www.jetbrains.com/help/youtrack/devportal/youtrack-rest-api.html
 
 """
+import hashlib
+import io
 import json
 import os
 import re
-import textwrap
+import shutil
+import sys
+import threading
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
-from urllib import request
-
-from rich import box
-from rich.console import Console
-from rich.table import Table
+from typing import Callable, Iterable, Iterator, TextIO
+from urllib import parse, request
+from urllib.error import HTTPError
+
+from ytissues.archive import BackupArchive
+from ytissues.cache import ResponseCache
+from ytissues.jsonstream import JsonStream, iter_chunks
+from ytissues.manifest import (
+    AttachmentIndex,
+    BackupJournal,
+    BackupManifest,
+    link_file,
+    timestamp,
+)
+from ytissues.render import Column, StreamingTable
+from ytissues.scheduler import RequestScheduler
+from ytissues.search import SearchIndex
 
 
 class Project:
@@ -27,11 +47,14 @@ class Project:
     get_list: str = "/youtrack/api/admin/projects"
     get_item: str = "/youtrack/api/admin/projects/{project_id}"
 
+    fields = "id,name,shortName"
+
     def __init__(self, project_id: str, shortname: str = None, name: str = None):
         self.project_id = project_id
         self.shortname = shortname or None
         self.name = name or None
         self._issues = None
+        self._issue_count = None
 
     @property
     def displayname(self) -> str:
@@ -45,9 +68,67 @@ class Project:
             self._issues = Issue.load(self.project_id)
         return self._issues
 
+    @property
+    def issue_count(self) -> int:
+        """Return the number of issues without loading the issues themselves."""
+        if self._issues is not None:
+            return len(self._issues)
+        if self._issue_count is None:
+            self._issue_count = Issue.count(self.project_id)
+        return self._issue_count
+
+    def iter_issues(self, deep: bool = False, query: str = None) -> Iterator["Issue"]:
+        """Yield the issues of the project page by page.
+
+        If the issues are already loaded and no query is given, the cached list is
+        used. Otherwise, the issues are streamed from the API without keeping
+        them in memory.
+
+        Args:
+            deep: Load comments and attachments with the issues, see `Issue.load`.
+            query: Only yield the issues matching this YouTrack search query, for
+                example `#Unresolved`.
+        """
+        if query is not None:
+            yield from Issue.iter_load(
+                self.project_id, deep=deep, query=self.search_query(query)
+            )
+        elif self._issues is not None:
+            yield from self._issues
+        else:
+            yield from Issue.iter_load(self.project_id, deep=deep)
+
+    def search_query(self, query: str) -> str:
+        """Return a YouTrack search query for the issues of this project."""
+        return f"project: {{{self.shortname or self.name}}} {query}"
+
     def __str__(self) -> str:
         return self.displayname
 
+    @staticmethod
+    def list_request(project_id: str = None) -> request.Request:
+        """Return the request for all projects or the project `project_id`."""
+        if project_id is None:  # list all Projects
+            return get_request(Project.get_list, f"fields={Project.fields}")
+        return get_request(
+            Project.get_item.format(project_id=project_id), f"fields={Project.fields}"
+        )
+
+    @staticmethod
+    def from_json(item: dict) -> "Project":
+        return Project(
+            project_id=item["id"], shortname=item["shortName"], name=item["name"]
+        )
+
+    @staticmethod
+    def list_from_json(json_data: list | dict) -> list:
+        if isinstance(json_data, list):
+            return [Project.from_json(item) for item in json_data]
+        try:
+            return [Project.from_json(json_data)]
+        except KeyError:  # we got no project
+            return []
+
     def __eq__(self, other):
         if isinstance(other, Project):
             return self.project_id == other.project_id
@@ -58,55 +139,135 @@ class Project:
         """Return one line for ls command."""
         line = f"{self.project_id} {self.shortname} {self.name}"
         if verbose:
-            line += f" {len(self.issues)} issues"
+            line += f" {self.issue_count} issues"
         return line
 
-    def print_details(self, as_table: bool, verbose: bool):
-        """Print Project with issues."""
+    def print_details(
+        self, as_table: bool, verbose: bool, issue_tables: Iterable["IssueTable"] = None
+    ):
+        """Print Project with issues.
 
+        Args:
+            as_table: Print a table instead of `;`-separated lines.
+            verbose: Print readable issue ids and the number of comments, too.
+            issue_tables: The issues to print (default: `iter_issue_tables()`).
+        """
+        if issue_tables is None:
+            issue_tables = self.iter_issue_tables()
         if as_table:
-            table = Table(
-                title=f"Project {self.displayname}",
-                caption=f"{len(self.issues)} issues in total",
-                box=box.ROUNDED,
-            )
-            table.add_column("ID", justify="right", no_wrap=True)
+            columns = [Column("ID", 8, "right")]
             if verbose:
-                table.add_column("Issue-ID", justify="right", no_wrap=True)
-
-            table.add_column("Created", justify="center", no_wrap=True)
-            table.add_column("Last Update", justify="center", no_wrap=True)
-            table.add_column("Resolved", justify="center", no_wrap=True)
-            table.add_column("Summary", no_wrap=False)
+                columns.append(Column("Issue-ID", 12, "right"))
+            columns += [
+                Column("Created", 16, "center"),
+                Column("Last Update", 16, "center"),
+                Column("Resolved", 8, "center"),
+                Column("Summary"),
+            ]
             if verbose:
-                table.add_column("Comments", no_wrap=True)
-            for issue in self.issues:
-                table.add_row(*get_issue_data(issue, verbose))
-            console = Console()
-            console.print(table)
+                columns.append(Column("Comments", 8, "right"))
+            table = StreamingTable(columns, title=f"Project {self.displayname}")
+            for issue_table in issue_tables:
+                table.print_rows(issue_table.rows(verbose))
+            table.print_footer(caption=f"{table.rows} issues in total")
         else:
-            if verbose:
-                print("Issue ID;Created;Last Update;Resolved;Summary;Comments")
-            else:
-                print("Issue ID;Created;Last Update;Resolved;Summary")
-            for issue in self.issues:
-                print(";".join(get_issue_data(issue, verbose)))
+            print(IssueTable.csv_header(verbose))
+            for issue_table in issue_tables:
+                issue_table.write_csv(sys.stdout, verbose, header=False)
 
-    def backup(self, backup_pathname: str):
-        """Write all Project data to files in the directory 'backup_pathname'.
-
-        Raises:
+    def iter_issue_tables(self, query: str = None) -> Iterator["IssueTable"]:
+        """Yield the issues of the project as `IssueTable`, page by page.
 
+        The cached issues are used like in `iter_issues`.
         """
+        if query is None and self._issues is not None:
+            yield IssueTable.from_issues(self._issues)
+        else:
+            yield from IssueTable.iter_load(
+                self.project_id, query=self.search_query(query) if query else None
+            )
+
+    def issue_table(self, query: str = None) -> "IssueTable":
+        """Return all issues of the project in one `IssueTable`."""
+        table = IssueTable()
+        for page in self.iter_issue_tables(query):
+            table.extend(page)
+        return table
 
+    def create_backup_path(self, backup_pathname: str) -> Path:
+        """Create the backup directory of the project and return its Path."""
         # main backup dir:
         backup_path = Path(trim_pathname(backup_pathname))
         backup_path.mkdir(parents=True, exist_ok=True)
         # the backup dir for one project:
         project_path = backup_path / trim_pathname(self.displayname)
         project_path.mkdir(parents=True, exist_ok=True)
-        for issue in self.issues:
-            issue.backup(project_path)
+        return project_path
+
+    def backup(
+        self,
+        backup_pathname: str,
+        jobs: int = 1,
+        incremental: bool = False,
+        journal: BackupJournal = None,
+    ):
+        """Write all Project data to files in the directory 'backup_pathname'.
+
+        Args:
+            backup_pathname: The root directory of the backup.
+            jobs: Number of issues saved concurrently. The files written are the
+                same for any number of jobs.
+            incremental: Only save the issues updated since the last incremental
+                backup, as recorded in the `BackupManifest` of the project.
+            journal: If given, the completed project, issues and attachments are
+                recorded, and those recorded before are skipped.
+
+        Raises:
+
+        """
+        if journal and journal.is_project_done(self.project_id):
+            return
+        project_path = self.create_backup_path(backup_pathname)
+        manifest = BackupManifest.load(project_path) if incremental else None
+        index = AttachmentIndex.load(project_path.parent)
+        search_index = SearchIndex.open(project_path.parent)
+        issues = self.iter_issues(
+            deep=True, query=manifest.updated_query() if manifest else None
+        )
+        if manifest:
+            issues = (issue for issue in issues if not manifest.is_unchanged(issue))
+        try:
+            for _ in bounded_map(
+                lambda issue: issue.backup(
+                    project_path, manifest, index, journal, search_index
+                ),
+                issues,
+                jobs,
+            ):
+                pass
+        finally:
+            index.save()
+            search_index.close()
+        if manifest:
+            manifest.save()
+        if journal:
+            journal.project_done(self.project_id)
+
+    def archive(self, backup_archive: BackupArchive, jobs: int = 1):
+        """Add the files of `backup` to `backup_archive`, without a directory.
+
+        Args:
+            backup_archive: The archive, see `BackupArchive`.
+            jobs: Number of issues downloaded concurrently; they are added to the
+                archive one after the other.
+        """
+        project_dirname = trim_pathname(self.displayname)
+        for _ in bounded_map(
+            lambda issue: issue.archive(backup_archive, project_dirname),
+            self.iter_issues(deep=True),
+            jobs,
+        ):
+            pass
 
 
 class Issue:
@@ -117,8 +278,29 @@ class Issue:
 
     get_list: str = "/youtrack/api/admin/projects/{project_id}/issues"
     get_item: str = "/youtrack/api/issues/{issue_id}"
+    search_list: str = "/youtrack/api/issues"
 
     fields = "id,idReadable,created,updated,resolved,summary,description,commentsCount"
+    page_size: int = 100
+    count_fields = "id"
+    count_page_size: int = 1000
+
+    blank_lines = re.compile(r"^[ \t]+$", re.MULTILINE)
+    """Lines of blanks and tabs, written as empty lines like `textwrap.dedent`."""
+
+    __slots__ = (
+        "issue_id",
+        "project_id",
+        "id_readable",
+        "created",
+        "updated",
+        "resolved",
+        "description",
+        "summary",
+        "comments_count",
+        "_comments",
+        "_attachments",
+    )
 
     def __init__(
         self,
@@ -167,87 +349,137 @@ class Issue:
         return self._attachments
 
     def load_attachments(self) -> list:
-        the_request = get_request(
-            IssueAttachment.get_list.format(issue_id=self.issue_id),
-            f"fields={IssueAttachment.fields}",
-        )
-        opened_url = request.urlopen(the_request)
-        if opened_url.getcode() == 200:
-            data = opened_url.read()
-            json_data = json.loads(data)
-            if isinstance(json_data, list):
-                issue_attachments = []
-                for item in json_data:
-                    issue_attachments.append(
-                        IssueAttachment(
-                            issue_id=self.issue_id,
-                            name=item["name"],
-                            size=item["size"],
-                            mimetype=item["mimeType"],
-                            extension=item["extension"],
-                            charset=item["charset"],
-                            url=item["url"],
-                        )
-                    )
-            else:
-                try:
-                    issue_attachments = [
-                        IssueAttachment(
-                            issue_id=self.issue_id,
-                            name=json_data["name"],
-                            size=json_data["size"],
-                            mimetype=json_data["mimeType"],
-                            extension=json_data["extension"],
-                            charset=json_data["charset"],
-                            url=json_data["url"],
-                        )
-                    ]
-                except KeyError:
-                    issue_attachments = []
-            return issue_attachments
-        else:
-            raise IOError(f"Error {opened_url.getcode()} receiving data")
+        json_data = get_json(IssueAttachment.list_request(self.issue_id))
+        return IssueAttachment.list_from_json(json_data, self.issue_id)
 
-    def backup(self, backup_path: Path):
+    def backup(
+        self,
+        backup_path: Path,
+        manifest: BackupManifest = None,
+        index: AttachmentIndex = None,
+        journal: BackupJournal = None,
+        search_index: SearchIndex = None,
+    ):
         """Save issue Data to backup_path.
 
         Args:
             backup_path: the pathlib.Path to the backup directory.
+            manifest: If given, attachments saved before with the same size are
+                not downloaded again, and the saved issue is recorded.
+            index: If given, attachments are saved with `save_attachment`.
+            journal: If given, the issue is skipped when recorded as done, and
+                recorded when done. Recorded attachments are not saved again.
+            search_index: If given, the saved issue is added to it.
         """
+        if journal and journal.is_issue_done(self.issue_id):
+            if manifest:
+                manifest.issue_saved(self)
+            return
         issue_path = backup_path / Path(self.summary)
         issue_path.mkdir(parents=True, exist_ok=True)
         filename = self.summary + ".md"
         filepath = issue_path / Path(filename)
+        with open(filepath, "w") as file:
+            self.write_markdown(file)
+        if search_index:
+            search_index.add(self, filepath)
+        for attachment in self.attachments:
+            save_file = issue_path / attachment.name
+            if manifest and manifest.is_attachment_unchanged(attachment, save_file):
+                continue
+            sha256 = journal and journal.saved_attachment(attachment, save_file)
+            if not sha256:
+                sha256 = self.save_attachment(attachment, save_file, index)
+                if journal:
+                    journal.attachment_done(attachment, sha256)
+            if manifest:
+                manifest.attachment_saved(attachment, sha256)
+        if manifest:
+            manifest.issue_saved(self)
+        if journal:
+            journal.issue_done(self.issue_id)
+
+    def markdown(self) -> str:
+        """Return the text of the markdown file of the issue in a backup."""
+        text = io.StringIO()
+        self.write_markdown(text)
+        return text.getvalue()
+
+    def write_markdown(self, file: TextIO):
+        """Write the markdown file of the issue in a backup to `file`.
+
+        The header, the attachment list and each comment are written one after
+        the other, without building the whole text. Blank lines in the comments
+        are emptied, as `textwrap.dedent` did over all comments before; it
+        removed nothing else, since the `---` line of each comment is not
+        indented.
+        """
         if self.resolved:
             resolved_text = f"Resolved: {self.resolved.strftime('%Y-%m-%d %H:%M')}.\n"
         else:
             resolved_text = "Resolved: No.\n"
-        issue_text = (
+        file.write(
             f"# {self.summary}\n"
             f"Created: {self.created.strftime('%Y-%m-%d %H:%M')}\n"
             f"Updated: {self.updated.strftime('%Y-%m-%d %H:%M')}\n"
             f"{resolved_text}\n"
             f"{self.description}\n"
         )
-        issue_text += self.attachment_list()
-        issue_text += "\n\n"
-        issue_text += textwrap.dedent(f"""{self.all_comments_as_text()}""")
-        filepath.write_text(issue_text)
-        if len(self.attachments) > 0:
-            yt_url = os.environ["YT_URL"]
-            for attachment in self.attachments:
-                save_file = issue_path / attachment.name
-                opened_url = request.urlopen(yt_url + attachment.url)
-                save_file.write_bytes(opened_url.read())
+        file.write(self.attachment_list())
+        file.write("\n\n")
+        for comment in self.comments:
+            file.write(Issue.blank_lines.sub("", comment.as_text()))
+
+    def archive(self, backup_archive: BackupArchive, project_dirname: str):
+        """Add the files of `backup` to `backup_archive`.
+
+        The attachments are downloaded to a temporary file first, so that the
+        archive gets only complete files.
+        """
+        issue_dirname = f"{project_dirname}/{self.summary}"
+        backup_archive.add_bytes(
+            f"{issue_dirname}/{self.summary}.md", self.markdown().encode("utf-8")
+        )
+        for attachment in self.attachments:
+            temp_path = backup_archive.temporary_path()
+            try:
+                attachment.download(temp_path)
+                backup_archive.add_file(f"{issue_dirname}/{attachment.name}", temp_path)
+            finally:
+                temp_path.unlink(missing_ok=True)
+
+    @staticmethod
+    def save_attachment(
+        attachment: "IssueAttachment", save_file: Path, index: AttachmentIndex = None
+    ) -> str:
+        """Save `attachment` to `save_file` and return its SHA-256 hash.
+
+        With an `index`, an unchanged copy of the attachment on disk is linked
+        (or copied) instead of downloaded, and a downloaded file is replaced by
+        a hard link to an identical file of another issue.
+        """
+        if index is None:
+            return attachment.download(save_file)
+        known = index.lookup(attachment)
+        if known is not None:
+            path, sha256 = known
+            if path != save_file and not link_file(path, save_file):
+                shutil.copyfile(path, save_file)
+        else:
+            sha256 = attachment.download(save_file)
+            duplicate = index.find_duplicate(sha256, save_file)
+            if duplicate is not None:
+                link_file(duplicate, save_file)
+        index.add(attachment, save_file, sha256)
+        return sha256
 
     def attachment_list(self) -> str:
         """Return a markdown-list of attachment names or empty string."""
-        attachment_list = ""
-        if len(self.attachments) > 0:
-            attachment_list += f"There are {len(self.attachments)} attachments:\n"
-            for item in self.attachments:
-                attachment_list += f"* {item.name}\n"
-        return attachment_list
+        if len(self.attachments) == 0:
+            return ""
+        return f"There are {len(self.attachments)} attachments:\n" + "".join(
+            f"* {item.name}\n" for item in self.attachments
+        )
 
     def all_comments_as_text(self) -> str:
         """List all comments to save them into the backup file.
@@ -255,58 +487,326 @@ class Issue:
         Returns:
             A (possibly big) string with all comments of the issue.
         """
-        comments = ""
-        for comment in self.comments:
-            comments += comment.as_text()
-        return comments
+        return "".join(comment.as_text() for comment in self.comments)
+
+    @staticmethod
+    def query_fields(deep: bool = False) -> str:
+        """Return the fields to request, with comments and attachments if `deep`."""
+        if not deep:
+            return Issue.fields
+        return (
+            f"{Issue.fields},comments({IssueComment.fields}),"
+            f"attachments({IssueAttachment.fields})"
+        )
+
+    @staticmethod
+    def from_json(item: dict, project_id: str) -> "Issue":
+        """Create an Issue from one item of the JSON issue list.
+
+        If the item contains the comments and attachments (see `query_fields`),
+        they are taken over. Comments are only taken if all `commentsCount`
+        comments are included; otherwise, they are loaded when needed.
+        """
+        created, updated, resolved = None, None, None
+        if item["created"] is not None:
+            created = datetime.fromtimestamp(item["created"] / 1000)
+        if item["updated"] is not None:
+            updated = datetime.fromtimestamp(item["updated"] / 1000)
+        if item["resolved"] is not None:
+            resolved = datetime.fromtimestamp(item["resolved"] / 1000)
+        issue = Issue(
+            issue_id=item["id"],
+            project_id=project_id,
+            id_readable=item["idReadable"],
+            created=created,
+            updated=updated,
+            resolved=resolved,
+            description=item["description"],
+            summary=item["summary"],
+            comments_count=item["commentsCount"],
+        )
+        comments = item.get("comments")
+        if comments is not None and len(comments) >= issue.comments_count:
+            issue._comments = IssueComment.list_from_json(comments)
+        attachments = item.get("attachments")
+        if attachments is not None:
+            issue._attachments = IssueAttachment.list_from_json(
+                attachments, issue.issue_id
+            )
+        return issue
+
+    @staticmethod
+    def list_from_json(json_data: list | dict, project_id: str) -> list:
+        """Return the issues of one page of the JSON issue list."""
+        if isinstance(json_data, list):
+            return [Issue.from_json(item, project_id) for item in json_data]
+        try:
+            return [Issue(issue_id=json_data["id"], project_id=project_id)]
+        except KeyError:  # we got no project
+            return []
+
+    @staticmethod
+    def list_query(deep: bool = False, query: str = None) -> str:
+        """Return the GET query string for the issue list."""
+        list_query = f"fields={Issue.query_fields(deep)}"
+        if query is not None:
+            list_query += f"&query={parse.quote(query)}"
+        return list_query
+
+    @staticmethod
+    def list_resource(project_id: str, query: str = None) -> str:
+        """Return the resource for the issues of a project or the issue search."""
+        if query is not None:
+            return Issue.search_list
+        return Issue.get_list.format(project_id=project_id)
 
     @staticmethod
-    def load(project_id: str) -> list:
-        the_request = get_request(
-            Issue.get_list.format(project_id=project_id),
-            f"fields={Issue.fields}&$top=1000",
+    def iter_load(
+        project_id: str, page_size: int = None, deep: bool = False, query: str = None
+    ) -> Iterator["Issue"]:
+        """Yield all issues of project `project_id`, requested page by page.
+
+        Args:
+            project_id: The ID of the project, for example `0-1`.
+            page_size: Number of issues per request (default: `Issue.page_size`).
+            deep: Request comments and attachments with the issues, instead of
+                two more requests per issue when they are accessed.
+            query: A YouTrack search query. The issues are then requested from the
+                issue search, so the query must select the project, see
+                `Project.search_query`.
+        """
+        for page in iter_page_streams(
+            Issue.list_resource(project_id, query),
+            Issue.list_query(deep, query),
+            Issue.page_size if page_size is None else page_size,
+        ):
+            for item in page:
+                yield Issue.from_json(item, project_id)
+            if not page.is_array:
+                yield from Issue.list_from_json(page.value, project_id)
+
+    @staticmethod
+    def count_page(json_data: list | dict) -> int:
+        """Return the number of issues in one page of the JSON issue list."""
+        if isinstance(json_data, list):
+            return len(json_data)
+        return 1 if "id" in json_data else 0
+
+    @staticmethod
+    def count(project_id: str) -> int:
+        """Return the number of issues of project `project_id`.
+
+        Only the issue IDs are requested, in pages of `Issue.count_page_size`.
+        """
+        return sum(
+            Issue.count_page(json_data)
+            for json_data in iter_pages(
+                Issue.get_list.format(project_id=project_id),
+                f"fields={Issue.count_fields}",
+                Issue.count_page_size,
+            )
         )
-        opened_url = request.urlopen(the_request)
-        if opened_url.getcode() == 200:
-            data = opened_url.read()
-            json_data = json.loads(data)
-            if isinstance(json_data, list):
-                issues = []
-                for item in json_data:
-                    created, updated, resolved = None, None, None
-                    if item["created"] is not None:
-                        created = datetime.fromtimestamp(item["created"] / 1000)
-                    if item["updated"] is not None:
-                        updated = datetime.fromtimestamp(item["updated"] / 1000)
-                    if item["resolved"] is not None:
-                        resolved = datetime.fromtimestamp(item["resolved"] / 1000)
-
-                    issues.append(
-                        Issue(
-                            issue_id=item["id"],
-                            project_id=project_id,
-                            id_readable=item["idReadable"],
-                            created=created,
-                            updated=updated,
-                            resolved=resolved,
-                            description=item["description"],
-                            summary=item["summary"],
-                            comments_count=item["commentsCount"],
-                        )
-                    )
-            else:
-                try:
-                    issues = [
-                        Issue(
-                            issue_id=json_data["id"],
-                            project_id=project_id,
-                        )
-                    ]
-                except KeyError:  # we got no project
-                    issues = []
-            return issues
+
+    @staticmethod
+    def load(project_id: str, page_size: int = None, deep: bool = False) -> list:
+        return list(Issue.iter_load(project_id, page_size, deep))
+
+
+@lru_cache(maxsize=1 << 16)
+def format_minute(minute: int) -> str:
+    """Return minute `minute` since the epoch as local time, for example
+    `2022-05-31 10:34`."""
+    return datetime.fromtimestamp(minute * 60).strftime("%Y-%m-%d %H:%M")
+
+
+class IssueTable:
+    """The issues of a project in columns, for listing many issues at once.
+
+    Timestamps are stored in arrays as milliseconds since the epoch (`NONE` if
+    missing), ids and summaries in lists. The columns are built from the JSON
+    issue list without creating `Issue` objects, and the rows are formatted
+    only when printed, with one `strftime` call per distinct minute.
+    """
+
+    NONE = -(2**63)
+    """Value of a missing timestamp."""
+
+    sort_keys = ("created", "updated", "resolved", "summaries")
+
+    def __init__(self):
+        self.issue_ids: list[str] = []
+        self.id_readables: list[str] = []
+        self.created = array("q")
+        self.updated = array("q")
+        self.resolved = array("q")
+        self.summaries: list[str] = []
+        self.comments_counts = array("q")
+
+    def __len__(self) -> int:
+        return len(self.issue_ids)
+
+    @staticmethod
+    def format_time(milliseconds: int) -> str:
+        if milliseconds == IssueTable.NONE:
+            return ""
+        return format_minute(milliseconds // 60000)
+
+    def append(
+        self,
+        issue_id: str,
+        id_readable: str | None,
+        created: int | None,
+        updated: int | None,
+        resolved: int | None,
+        summary: str | None,
+        comments_count: int,
+    ):
+        """Append one issue; the summary is completed like `Issue.create_summary`."""
+        none = IssueTable.NONE
+        if created is not None and id_readable and summary:
+            date = IssueTable.format_time(created)[:10]
+            summary = trim_filename(f"{date} {id_readable} - {summary}")
+        self.issue_ids.append(issue_id)
+        self.id_readables.append(id_readable or "")
+        self.created.append(none if created is None else created)
+        self.updated.append(none if updated is None else updated)
+        self.resolved.append(none if resolved is None else resolved)
+        self.summaries.append(sys.intern(summary or ""))
+        self.comments_counts.append(comments_count or 0)
+
+    def extend_json(self, json_data: Iterable[dict] | dict):
+        """Append the issues of one page of the JSON issue list.
+
+        `json_data` may also be a `JsonStream` of the page.
+        """
+        if isinstance(json_data, dict):
+            json_data = [json_data] if "id" in json_data else []
+        for item in json_data:
+            self.append(
+                item["id"],
+                item.get("idReadable"),
+                item.get("created"),
+                item.get("updated"),
+                item.get("resolved"),
+                item.get("summary"),
+                item.get("commentsCount", 0),
+            )
+
+    @staticmethod
+    def from_issues(issues: Iterable[Issue]) -> "IssueTable":
+        """Return a table of the (already loaded) `issues`."""
+        table = IssueTable()
+        for issue in issues:
+            for name in ("created", "updated", "resolved"):
+                milliseconds = timestamp(getattr(issue, name))
+                column = getattr(table, name)
+                column.append(IssueTable.NONE if milliseconds is None else milliseconds)
+            table.issue_ids.append(issue.issue_id)
+            table.id_readables.append(issue.id_readable or "")
+            table.summaries.append(sys.intern(issue.summary or ""))
+            table.comments_counts.append(issue.comments_count or 0)
+        return table
+
+    @staticmethod
+    def iter_load(
+        project_id: str, page_size: int = None, query: str = None
+    ) -> Iterator["IssueTable"]:
+        """Yield the issues of project `project_id` as one table per page.
+
+        The arguments are those of `Issue.iter_load`.
+        """
+        for page in iter_page_streams(
+            Issue.list_resource(project_id, query),
+            Issue.list_query(query=query),
+            Issue.page_size if page_size is None else page_size,
+        ):
+            table = IssueTable()
+            table.extend_json(page)
+            if not page.is_array:
+                table.extend_json(page.value)
+            yield table
+
+    @staticmethod
+    def load(project_id: str, page_size: int = None, query: str = None) -> "IssueTable":
+        """Return all issues of project `project_id` in one table."""
+        table = IssueTable()
+        for page in IssueTable.iter_load(project_id, page_size, query):
+            table.extend(page)
+        return table
+
+    def extend(self, other: "IssueTable"):
+        self.issue_ids += other.issue_ids
+        self.id_readables += other.id_readables
+        self.created += other.created
+        self.updated += other.updated
+        self.resolved += other.resolved
+        self.summaries += other.summaries
+        self.comments_counts += other.comments_counts
+
+    def take(self, indices: Iterable[int]) -> "IssueTable":
+        """Return a new table with the rows at `indices`, in that order."""
+        indices = list(indices)
+        table = IssueTable()
+        table.issue_ids = [self.issue_ids[i] for i in indices]
+        table.id_readables = [self.id_readables[i] for i in indices]
+        for name in ("created", "updated", "resolved", "comments_counts"):
+            column = getattr(self, name)
+            setattr(table, name, array("q", [column[i] for i in indices]))
+        table.summaries = [self.summaries[i] for i in indices]
+        return table
+
+    def filter(
+        self, unresolved: bool = False, updated_since: datetime = None
+    ) -> "IssueTable":
+        """Return the issues, which are unresolved and/or updated since a moment."""
+        selected = range(len(self))
+        if unresolved:
+            none = IssueTable.NONE
+            selected = [i for i in selected if self.resolved[i] == none]
+        if updated_since is not None:
+            since, updated = timestamp(updated_since), self.updated
+            selected = [i for i in selected if updated[i] >= since]
+        return self.take(selected)
+
+    def sort(self, key: str = "created", reverse: bool = False) -> "IssueTable":
+        """Return the issues sorted by the column `key` (see `sort_keys`)."""
+        if key not in IssueTable.sort_keys:
+            raise ValueError(f"Cannot sort issues by '{key}'")
+        column = getattr(self, key)
+        order = sorted(range(len(self)), key=column.__getitem__, reverse=reverse)
+        return self.take(order)
+
+    def rows(self, verbose: bool = False) -> Iterator[list[str]]:
+        """Yield the rows as formatted by `get_issue_data`."""
+        created = map(IssueTable.format_time, self.created)
+        updated = map(IssueTable.format_time, self.updated)
+        none = IssueTable.NONE
+        resolved = ("No" if value == none else "Yes" for value in self.resolved)
+        if verbose:
+            columns = (
+                self.issue_ids,
+                self.id_readables,
+                created,
+                updated,
+                resolved,
+                self.summaries,
+                map(str, self.comments_counts),
+            )
         else:
-            raise IOError(f"Error {opened_url.getcode()} receiving data")
+            columns = (self.issue_ids, created, updated, resolved, self.summaries)
+        return map(list, zip(*columns))
+
+    @staticmethod
+    def csv_header(verbose: bool = False) -> str:
+        if verbose:
+            return "Issue ID;Created;Last Update;Resolved;Summary;Comments"
+        return "Issue ID;Created;Last Update;Resolved;Summary"
+
+    def write_csv(self, file: TextIO, verbose: bool = False, header: bool = True):
+        """Write the issues as lines of `;` separated fields to `file`."""
+        if header:
+            file.write(IssueTable.csv_header(verbose) + "\n")
+        file.writelines(";".join(row) + "\n" for row in self.rows(verbose))
 
 
 class IssueAttachment:
@@ -314,6 +814,9 @@ class IssueAttachment:
 
     get_list = "/youtrack/api/issues/{issue_id}/attachments"
     fields = "name,size,mimeType,extension,charset,url"
+    chunk_size: int = 1024 * 1024
+
+    __slots__ = ("issue_id", "name", "size", "mimetype", "extension", "charset", "url")
 
     def __init__(self, issue_id, name, size, mimetype, extension, charset, url):
         self.issue_id = issue_id
@@ -324,6 +827,79 @@ class IssueAttachment:
         self.charset = charset
         self.url = url
 
+    def download(self, save_file: Path) -> str:
+        """Download the attachment to `save_file` and return its SHA-256 hash.
+
+        The data is written in chunks to `save_file` with suffix `.part`, which
+        replaces `save_file` when it has the size of the attachment. If a `.part`
+        file is left from an interrupted download, only the missing bytes are
+        requested (HTTP Range), if the server supports it.
+
+        Raises:
+            IOError, if server connection returns error or the size is wrong.
+        """
+        part_file = save_file.with_name(save_file.name + ".part")
+        sha256 = hashlib.sha256()
+        offset = part_file.stat().st_size if part_file.exists() else 0
+        if offset > self.size:
+            offset = 0
+        if offset == 0 or offset < self.size:
+            headers = {"Range": f"bytes={offset}-"} if offset else {}
+            the_request = request.Request(
+                os.environ["YT_URL"] + self.url, headers=headers
+            )
+            with open_url(the_request) as opened_url:
+                status = opened_url.getcode()
+                if status == 200:
+                    offset = 0
+                elif status != 206:
+                    raise IOError(f"Error {status} receiving data")
+                if offset:
+                    update_hash(sha256, part_file)
+                with part_file.open("ab" if offset else "wb") as file:
+                    while chunk := opened_url.read(self.chunk_size):
+                        file.write(chunk)
+                        sha256.update(chunk)
+        else:  # complete, but not renamed
+            update_hash(sha256, part_file)
+        size = part_file.stat().st_size
+        if size != self.size:
+            if size > self.size:
+                part_file.unlink()
+            raise IOError(
+                f"Attachment {self.name}: received {size} of {self.size} bytes"
+            )
+        os.replace(part_file, save_file)
+        return sha256.hexdigest()
+
+    @staticmethod
+    def list_request(issue_id: str) -> request.Request:
+        return get_request(
+            IssueAttachment.get_list.format(issue_id=issue_id),
+            f"fields={IssueAttachment.fields}",
+        )
+
+    @staticmethod
+    def from_json(item: dict, issue_id: str) -> "IssueAttachment":
+        return IssueAttachment(
+            issue_id=issue_id,
+            name=item["name"],
+            size=item["size"],
+            mimetype=item["mimeType"],
+            extension=item["extension"],
+            charset=item["charset"],
+            url=item["url"],
+        )
+
+    @staticmethod
+    def list_from_json(json_data: list | dict, issue_id: str) -> list:
+        if isinstance(json_data, list):
+            return [IssueAttachment.from_json(item, issue_id) for item in json_data]
+        try:
+            return [IssueAttachment.from_json(json_data, issue_id)]
+        except KeyError:
+            return []
+
 
 class IssueComment:
     """Represent a Comment in an Issue in YouTrack.
@@ -336,6 +912,15 @@ class IssueComment:
 
     fields = "id,text,created,updated,author(name),attachments(id,name)"
 
+    __slots__ = (
+        "comment_id",
+        "author",
+        "created",
+        "updated",
+        "text",
+        "_attachment_names",
+    )
+
     def __init__(
         self,
         comment_id: str,
@@ -372,55 +957,44 @@ class IssueComment:
         return self.__str__()
 
     @staticmethod
-    def load(issue_id: str) -> list:
-        """Return list of comments for Issue issue_id."""
-        the_request = get_request(
+    def list_request(issue_id: str) -> request.Request:
+        return get_request(
             IssueComment.get_list.format(issue_id=issue_id),
             f"fields={IssueComment.fields}",
         )
-        opened_url = request.urlopen(the_request)
-        if opened_url.getcode() == 200:
-            data = opened_url.read()
-            json_data = json.loads(data)
-            if isinstance(json_data, list):
-                issue_comments = []
-                for item in json_data:
-                    created, updated = None, None
-                    if item["created"] is not None:
-                        created = datetime.fromtimestamp(item["created"] / 1000)
-                    if item["updated"] is not None:
-                        updated = datetime.fromtimestamp(item["updated"] / 1000)
-
-                    issue_comments.append(
-                        IssueComment(
-                            comment_id=item["id"],
-                            author=item["author"]["name"],
-                            created=created,
-                            updated=updated,
-                            text=item["text"],
-                        )
-                    )
-            else:
-                try:
-                    created, updated = None, None
-                    if json_data["created"] is not None:
-                        created = datetime.fromtimestamp(json_data["created"] / 1000)
-                    if json_data["updated"] is not None:
-                        updated = datetime.fromtimestamp(json_data["updated"] / 1000)
-                    issue_comments = [
-                        IssueComment(
-                            comment_id=json_data["id"],
-                            author=json_data["author"],
-                            created=created,
-                            updated=updated,
-                            text=json_data["text"],
-                        )
-                    ]
-                except KeyError:  # we got no project
-                    issue_comments = []
-            return issue_comments
-        else:
-            raise IOError(f"Error {opened_url.getcode()} receiving data")
+
+    @staticmethod
+    def from_json(item: dict) -> "IssueComment":
+        created, updated = None, None
+        if item["created"] is not None:
+            created = datetime.fromtimestamp(item["created"] / 1000)
+        if item["updated"] is not None:
+            updated = datetime.fromtimestamp(item["updated"] / 1000)
+        return IssueComment(
+            comment_id=item["id"],
+            author=sys.intern(item["author"]["name"]),
+            created=created,
+            updated=updated,
+            text=item["text"],
+        )
+
+    @staticmethod
+    def list_from_json(json_data: list | dict) -> list:
+        if isinstance(json_data, list):
+            return [IssueComment.from_json(item) for item in json_data]
+        try:
+            return [IssueComment.from_json(json_data)]
+        except KeyError:  # we got no comment
+            return []
+
+    @staticmethod
+    def load(issue_id: str) -> list:
+        """Return list of comments for Issue issue_id."""
+        with open_json(IssueComment.list_request(issue_id)) as stream:
+            comments = [IssueComment.from_json(item) for item in stream]
+        if not stream.is_array:
+            comments = IssueComment.list_from_json(stream.value)
+        return comments
 
 
 def get_issue_data(issue: Issue, verbose: bool = False) -> [str]:
@@ -451,6 +1025,137 @@ def get_issue_data(issue: Issue, verbose: bool = False) -> [str]:
         ]
 
 
+def bounded_map(func: Callable, iterable: Iterable, jobs: int = 1) -> Iterator:
+    """Yield `func(item)` for all items in `iterable` using `jobs` threads.
+
+    Unlike `Executor.map`, the iterable is consumed lazily: at most `2 * jobs`
+    items are in progress at any time. The results are yielded in the order of
+    `iterable`; an exception in `func` is raised when its result is reached.
+    """
+    if jobs < 1:
+        raise ValueError(f"Number of jobs must be positive: {jobs}")
+    if jobs == 1:
+        yield from map(func, iterable)
+        return
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        pending = []
+        for item in iterable:
+            pending.append(executor.submit(func, item))
+            if len(pending) >= 2 * jobs:
+                yield pending.pop(0).result()
+        while pending:
+            yield pending.pop(0).result()
+
+
+max_requests_per_host: int = 8
+"""Maximum number of requests in flight to the same host."""
+
+request_scheduler = RequestScheduler()
+"""Retries and paces all requests, see `RequestScheduler`."""
+
+_host_slots: dict[str, threading.BoundedSemaphore] = {}
+_host_slots_lock = threading.Lock()
+
+
+def _host_slot(url: str) -> threading.BoundedSemaphore:
+    host = parse.urlsplit(url).netloc
+    with _host_slots_lock:
+        if host not in _host_slots:
+            _host_slots[host] = threading.BoundedSemaphore(max_requests_per_host)
+        return _host_slots[host]
+
+
+@contextmanager
+def open_url(the_request: request.Request):
+    """Open `the_request` while holding one of the request slots of its host.
+
+    The slot is held until the with-block is left, so the response should be
+    read completely inside the block. Failed requests are retried by the
+    `request_scheduler`.
+    """
+    with _host_slot(the_request.full_url):
+        yield request_scheduler.call(lambda: request.urlopen(the_request))
+
+
+response_cache: ResponseCache | None = None
+"""If set, `get_json` and `open_json` use this cache for all responses."""
+
+json_chunk_size: int = 64 * 1024
+"""Number of bytes read at once by `open_json`."""
+
+
+def read_response(the_request: request.Request) -> tuple[int, dict, bytes]:
+    """Return status, headers and body of the response to `the_request`.
+
+    Status 304 (Not Modified) is returned, not raised, to revalidate cached
+    responses.
+
+    Raises:
+        IOError, if server connection returns error
+    """
+    try:
+        with open_url(the_request) as opened_url:
+            status = opened_url.getcode()
+            if status == 200:
+                return status, getattr(opened_url, "headers", {}), opened_url.read()
+    except HTTPError as err:
+        if err.code != 304:
+            raise
+        status = err.code
+    if status == 304:
+        return status, {}, b""
+    raise IOError(f"Error {status} receiving data")
+
+
+def get_json(the_request: request.Request) -> list | dict:
+    """Return the decoded JSON data of a response to `the_request`.
+
+    Raises:
+        IOError, if server connection returns error
+    """
+    if response_cache is not None:
+        return json.loads(response_cache.get(the_request, read_response))
+    status, headers, data = read_response(the_request)
+    if status != 200:
+        raise IOError(f"Error {status} receiving data")
+    return json.loads(data)
+
+
+@contextmanager
+def open_json(the_request: request.Request) -> Iterator[JsonStream]:
+    """Open the response to `the_request` as `JsonStream` of its items.
+
+    The items are decoded while the response is read in chunks of
+    `json_chunk_size` bytes, inside the with-block. A cached response is
+    decoded from the cache the same way.
+
+    Raises:
+        IOError, if server connection returns error
+    """
+    if response_cache is not None:
+        body = response_cache.get(the_request, read_response)
+        yield JsonStream(iter_chunks(body, json_chunk_size))
+        return
+    with open_url(the_request) as opened_url:
+        status = opened_url.getcode()
+        if status != 200:
+            raise IOError(f"Error {status} receiving data")
+        yield JsonStream(read_chunks(opened_url, json_chunk_size))
+
+
+def read_chunks(file, chunk_size: int) -> Iterator[bytes]:
+    """Yield the data of `file` in chunks of up to `chunk_size` bytes."""
+    while chunk := file.read(chunk_size):
+        yield chunk
+
+
+def update_hash(file_hash, path: Path, chunk_size: int = 1024 * 1024):
+    """Update the hashlib object `file_hash` with the content of `path`."""
+    with path.open("rb") as file:
+        while chunk := file.read(chunk_size):
+            file_hash.update(chunk)
+
+
 def get_request(resource: str, query: str) -> request.Request:
     """Return a Request object for the YT service.
 
@@ -483,6 +1188,58 @@ def get_request(resource: str, query: str) -> request.Request:
     return request.Request(url, headers=headers)
 
 
+def get_page_request(
+    resource: str, query: str, skip: int, page_size: int
+) -> request.Request:
+    """Return the Request for the page of a list resource starting at `skip`."""
+    return get_request(resource, f"{query}&$skip={skip}&$top={page_size}")
+
+
+def iter_pages(resource: str, query: str, page_size: int) -> Iterator[list | dict]:
+    """Yield the decoded JSON pages of a list resource using `$skip` and `$top`.
+
+    Paging stops with the first page having less than `page_size` items. If the
+    service answers with a single object instead of a list, that object is yielded
+    as the only page.
+
+    Args:
+        resource: The api resource, for example `/youtrack/api/admin/projects`
+        query: The GET query string, for example `fields=id,name,shortName'
+        page_size: The number of items to request per page.
+
+    Raises:
+        IOError, if server connection returns error
+    """
+    if page_size < 1:
+        raise ValueError(f"Page size must be positive: {page_size}")
+    skip = 0
+    while True:
+        json_data = get_json(get_page_request(resource, query, skip, page_size))
+        yield json_data
+        if not isinstance(json_data, list) or len(json_data) < page_size:
+            return
+        skip += page_size
+
+
+def iter_page_streams(
+    resource: str, query: str, page_size: int
+) -> Iterator[JsonStream]:
+    """Yield the pages of a list resource like `iter_pages`, as `JsonStream`.
+
+    Each page must be iterated before the next one is requested; the response
+    is read while its items are decoded.
+    """
+    if page_size < 1:
+        raise ValueError(f"Page size must be positive: {page_size}")
+    skip = 0
+    while True:
+        with open_json(get_page_request(resource, query, skip, page_size)) as page:
+            yield page
+        if not page.is_array or page.count < page_size:
+            return
+        skip += page_size
+
+
 def get_project(project_id: str) -> Project:
     projects = get_projects(project_id)
     if len(projects) != 1:
@@ -491,41 +1248,11 @@ def get_project(project_id: str) -> Project:
 
 
 def get_projects(project_id: str = None) -> list[Project]:
-    if project_id is None:  # list all Projects
-        the_request = get_request(Project.get_list, "fields=id,name,shortName")
-    else:
-        the_request = get_request(
-            Project.get_item.format(project_id=project_id),
-            "fields=id,name,shortName",
-        )
-    opened_url = request.urlopen(the_request)
-    if opened_url.getcode() == 200:
-        data = opened_url.read()
-        json_data = json.loads(data)
-        if isinstance(json_data, list):
-            projects = []
-            for item in json_data:
-                projects.append(
-                    Project(
-                        project_id=item["id"],
-                        shortname=item["shortName"],
-                        name=item["name"],
-                    )
-                )
-        else:
-            try:
-                projects = [
-                    Project(
-                        project_id=json_data["id"],
-                        shortname=json_data["shortName"],
-                        name=json_data["name"],
-                    )
-                ]
-            except KeyError:  # we got no project
-                projects = []
-        return projects
-    else:
-        raise IOError(f"Error {opened_url.getcode()} receiving data")
+    with open_json(Project.list_request(project_id)) as stream:
+        projects = [Project.from_json(item) for item in stream]
+    if not stream.is_array:
+        projects = Project.list_from_json(stream.value)
+    return projects
 
 
 def trim_pathname(pathname: str) -> str:
@@ -1,5 +1,9 @@
+import hashlib
+import json
 import os
-from urllib import request
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib import parse, request
 
 import pytest
 
@@ -19,12 +23,16 @@ def yt_auth():
 class MockedResponse:
     RESPONSE = ""
     STATUS_CODE = 500
+    _offset = 0
 
     def getcode(self):
         return self.STATUS_CODE
 
-    def read(self) -> str:
-        return self.RESPONSE
+    def read(self, size: int = -1) -> str:
+        end = None if size is None or size < 0 else self._offset + size
+        data = self.RESPONSE[self._offset : end]
+        self._offset += len(data)
+        return data
 
 
 class MockedResponseError(MockedResponse):
@@ -212,3 +220,197 @@ def error_response():
 def list_5_projects(monkeypatch, filled_project_list):
     monkeypatch.setattr(request, "urlopen", filled_project_list)
     return get_projects()
+
+
+@pytest.fixture
+def paged_issue_list():
+    """Serve the filled issue list page by page, respecting `$skip` and `$top`."""
+    all_issues = json.loads(MockedIssueResponseFilledList.RESPONSE)
+    requested_urls = []
+
+    def mocked_urlopen(the_request, *args, **kwargs):
+        requested_urls.append(the_request.full_url)
+        query = parse.parse_qs(parse.urlsplit(the_request.full_url).query)
+        skip, top = int(query["$skip"][0]), int(query["$top"][0])
+        response = MockedResponse()
+        response.STATUS_CODE = 200
+        response.RESPONSE = json.dumps(all_issues[skip : skip + top])
+        return response
+
+    mocked_urlopen.requested_urls = requested_urls
+    return mocked_urlopen
+
+
+class MockedCommentResponseFilledList(MockedResponse):
+    RESPONSE = """
+        [
+          {
+            "text": "The first comment.",
+            "created": 1637587300000,
+            "updated": null,
+            "author": {"name": "Gustavo", "$type": "User"},
+            "attachments": [],
+            "id": "4-1",
+            "$type": "IssueComment"
+          },
+          {
+            "text": "The second comment.\\n\\n    With an indented line.",
+            "created": 1637587400000,
+            "updated": 1637587500000,
+            "author": {"name": "Maria", "$type": "User"},
+            "attachments": [],
+            "id": "4-2",
+            "$type": "IssueComment"
+          }
+        ]
+    """
+    STATUS_CODE = 200
+
+
+class MockedAttachmentResponseFilledList(MockedResponse):
+    RESPONSE = """
+        [
+          {
+            "name": "screenshot.png",
+            "size": 11,
+            "mimeType": "image/png",
+            "extension": "png",
+            "charset": null,
+            "url": "/api/files/8-1?sign=abc",
+            "$type": "IssueAttachment"
+          }
+        ]
+    """
+    STATUS_CODE = 200
+
+
+class MockedAttachmentContent(MockedResponse):
+    RESPONSE = b"PNG content"
+    STATUS_CODE = 200
+
+
+@pytest.fixture
+def youtrack_api(paged_issue_list):
+    """Answer all requests of a project backup by the resource of the url.
+
+    Issue `2-2` has comments and issue `2-3` has an attachment.
+    """
+
+    def mocked_urlopen(the_request, *args, **kwargs):
+        path = parse.urlsplit(the_request.full_url).path
+        if path.endswith("/issues"):
+            return paged_issue_list(the_request)
+        if path.endswith("/2-2/comments"):
+            return MockedCommentResponseFilledList()
+        if path.endswith("/2-3/attachments"):
+            return MockedAttachmentResponseFilledList()
+        if path.endswith("/api/files/8-1"):
+            return MockedAttachmentContent()
+        return MockedResponseEmpty()
+
+    return mocked_urlopen
+
+
+class StubYouTrackHandler(BaseHTTPRequestHandler):
+    """Answer GET requests with the content of `server.routes[path]`.
+
+    Lists are sliced by the query parameters `$skip` and `$top`, other JSON
+    data is returned as it is. Bytes are returned from the offset of a `Range`
+    header, if any. Unknown paths return 404. Responses have an `ETag` and
+    `If-None-Match` is answered with 304. The statuses in `server.failures[path]`
+    are answered first, one per request, with `Retry-After: 0`.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        url = parse.urlsplit(self.path)
+        self.server.requested_urls.append(self.path)
+        if self.server.failures.get(url.path):
+            status = self.server.failures[url.path].pop(0)
+            self.send_answer(status, {"error": "failure"}, {"Retry-After": "0"})
+            return
+        if url.path not in self.server.routes:
+            self.send_answer(404, json.loads(MockedResponseError.RESPONSE))
+            return
+        content = self.server.routes[url.path]
+        query = parse.parse_qs(url.query)
+        if isinstance(content, list) and "$top" in query:
+            skip, top = int(query["$skip"][0]), int(query["$top"][0])
+            content = content[skip : skip + top]
+        if isinstance(content, bytes) and "Range" in self.headers:
+            self.server.requested_ranges.append(self.headers["Range"])
+            offset = int(self.headers["Range"].removeprefix("bytes=").rstrip("-"))
+            self.send_answer(
+                206,
+                content[offset:],
+                {"Content-Range": f"bytes {offset}-{len(content) - 1}/{len(content)}"},
+            )
+            return
+        self.send_answer(200, content)
+
+    def send_answer(self, status: int, content, headers: dict = None):
+        if isinstance(content, bytes):
+            body, content_type = content, "application/octet-stream"
+        else:
+            body, content_type = json.dumps(content).encode(), "application/json"
+        etag = f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+        if status == 200 and self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.send_response(status)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def youtrack_server(monkeypatch):
+    """Run a local stub of the YT service and point YT_URL to it.
+
+    The routes contain the projects, the issues of project `0-1`, comments of
+    issue `2-2` and an attachment of issue `2-3`; tests may change them.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubYouTrackHandler)
+    server.requested_urls = []
+    server.requested_ranges = []
+    server.failures = {}
+    server.routes = {
+        "/youtrack/api/admin/projects": json.loads(
+            MockedProjectResponseFilledList.RESPONSE
+        ),
+        "/youtrack/api/admin/projects/0-1": json.loads(
+            MockedProjectResponseOneProjectList.RESPONSE
+        ),
+        "/youtrack/api/admin/projects/0-1/issues": json.loads(
+            MockedIssueResponseFilledList.RESPONSE
+        ),
+        "/youtrack/api/issues/2-2/comments": json.loads(
+            MockedCommentResponseFilledList.RESPONSE
+        ),
+        "/youtrack/api/issues/2-3/attachments": json.loads(
+            MockedAttachmentResponseFilledList.RESPONSE
+        ),
+        "/api/files/8-1": MockedAttachmentContent.RESPONSE,
+    }
+    for issue_id in ("2-1", "2-2", "2-3"):
+        server.routes.setdefault(f"/youtrack/api/issues/{issue_id}/comments", [])
+        server.routes.setdefault(f"/youtrack/api/issues/{issue_id}/attachments", [])
+    thread = threading.Thread(
+        target=server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True
+    )
+    thread.start()
+    server.url = f"http://127.0.0.1:{server.server_port}"
+    monkeypatch.setenv("YT_URL", server.url)
+    yield server
+    server.shutdown()
+    server.server_close()
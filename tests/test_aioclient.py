@@ -0,0 +1,117 @@
+"""Test the asyncio client against a local stub of the YT service."""
+import asyncio
+
+import pytest
+
+from ytissues import cli
+from ytissues.aioclient import AsyncClient
+from ytissues.cli import parse_arguments
+from ytissues.manifest import AttachmentIndex
+from ytissues.search import SearchIndex
+from ytissues.ytlib import Issue, Project
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+async def with_client(method: str, *args, **kwargs):
+    async with AsyncClient(max_concurrency=4) as client:
+        return await getattr(client, method)(*args, **kwargs)
+
+
+# noinspection PyUnusedLocal
+class TestAsyncLoaders:
+    def test_get_projects(self, youtrack_server):
+        projects = run(with_client("get_projects"))
+        assert [project.project_id for project in projects] == [
+            f"0-{number}" for number in range(1, 6)
+        ]
+
+    def test_get_project(self, youtrack_server):
+        project = run(with_client("get_project", "0-1"))
+        assert project == Project("0-1")
+        assert project.shortname == "FIRST"
+
+    def test_get_unknown_project_raises(self, youtrack_server):
+        with pytest.raises(IOError):
+            run(with_client("get_project", "0-42"))
+
+    def test_load_issues_with_pages(self, youtrack_server):
+        issues = run(with_client("load_issues", "0-1", page_size=2))
+        assert [issue.issue_id for issue in issues] == ["2-1", "2-2", "2-3"]
+        assert all(isinstance(issue, Issue) for issue in issues)
+        pages = [url for url in youtrack_server.requested_urls if "$skip" in url]
+        assert len(pages) == 2
+
+    def test_load_comments(self, youtrack_server):
+        comments = run(with_client("load_comments", "2-2"))
+        assert [comment.author for comment in comments] == ["Gustavo", "Maria"]
+
+    def test_load_attachments(self, youtrack_server):
+        attachments = run(with_client("load_attachments", "2-3"))
+        assert attachments[0].name == "screenshot.png"
+        assert attachments[0].issue_id == "2-3"
+
+    def test_load_project_issues(self, youtrack_server):
+        projects = [Project("0-1"), Project("0-1")]
+        run(with_client("load_project_issues", projects))
+        assert [len(project.issues) for project in projects] == [3, 3]
+
+    def test_count_issues(self, youtrack_server, monkeypatch):
+        monkeypatch.setattr(Issue, "count_page_size", 2)
+        assert run(with_client("count_issues", "0-1")) == 3
+        assert all("fields=id&" in url for url in youtrack_server.requested_urls)
+
+    def test_load_issue_counts(self, youtrack_server):
+        projects = [Project("0-1"), Project("0-1")]
+        run(with_client("load_issue_counts", projects))
+        assert [project._issue_count for project in projects] == [3, 3]
+        assert all(project._issues is None for project in projects)
+
+    def test_concurrency_must_be_positive(self):
+        with pytest.raises(ValueError):
+            AsyncClient(max_concurrency=0)
+
+
+# noinspection PyUnusedLocal
+class TestAsyncBackup:
+    def test_backup_project_writes_same_files(self, youtrack_server, tmp_path):
+        Project("0-1", "FIRST").backup(str(tmp_path / "sync"))
+        project = Project("0-1", "FIRST")
+        run(with_client("backup_project", project, str(tmp_path / "async")))
+        sync_files = sorted(
+            path.relative_to(tmp_path / "sync")
+            for path in (tmp_path / "sync").rglob("*")
+            if path.name not in (AttachmentIndex.filename, SearchIndex.filename)
+        )
+        async_files = sorted(
+            path.relative_to(tmp_path / "async")
+            for path in (tmp_path / "async").rglob("*")
+            if path.name not in (AttachmentIndex.filename, SearchIndex.filename)
+        )
+        assert len(sync_files) == 8
+        assert sync_files == async_files
+        for path in sync_files:
+            if (tmp_path / "sync" / path).is_file():
+                assert (tmp_path / "sync" / path).read_bytes() == (
+                    tmp_path / "async" / path
+                ).read_bytes()
+
+    def test_cli_async_backup(self, youtrack_server, tmp_path):
+        args = parse_arguments(
+            ["backup", "--async", "-j", "3", "-i", "0-1", str(tmp_path)]
+        )
+        cli.backup(args)
+        assert len(list((tmp_path / "FIRST").rglob("*.md"))) == 3
+
+
+def test_cli_ls_verbose_loads_issues(youtrack_server, capfd):
+    for number in range(2, 6):
+        youtrack_server.routes[f"/youtrack/api/admin/projects/0-{number}/issues"] = []
+    cli.ls(parse_arguments(["ls", "-v"]))
+    out, err = capfd.readouterr()
+    assert "0-1 FIRST First Project 3 issues" in out
+    assert "0-5 FIFTH Fifth Project 0 issues" in out
+    issue_requests = [url for url in youtrack_server.requested_urls if "/issues" in url]
+    assert all("fields=id&" in url for url in issue_requests)
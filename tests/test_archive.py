@@ -0,0 +1,86 @@
+"""Test the backup into a single archive file."""
+import io
+import sys
+import tarfile
+import zipfile
+
+import pytest
+
+from ytissues import cli
+from ytissues.archive import BackupArchive
+from ytissues.cli import parse_arguments
+from ytissues.ytlib import Project
+
+
+def directory_backup(tmp_path) -> dict[str, bytes]:
+    backup_path = tmp_path / "directory"
+    Project("0-1", "FIRST").backup(str(backup_path))
+    return {
+        path.relative_to(backup_path).as_posix(): path.read_bytes()
+        for path in backup_path.rglob("*")
+        if path.is_file() and not path.name.startswith(".")
+    }
+
+
+def tar_content(tar: tarfile.TarFile) -> dict[str, bytes]:
+    return {
+        member.name: tar.extractfile(member).read()
+        for member in tar.getmembers()
+        if member.isfile()
+    }
+
+
+# noinspection PyUnusedLocal
+class TestArchiveBackup:
+    @pytest.mark.parametrize("suffix", [".tar", ".tar.gz", ".tar.xz"])
+    def test_tar_has_files_of_backup(self, youtrack_server, tmp_path, suffix):
+        target = tmp_path / f"backup{suffix}"
+        cli.backup(parse_arguments(["backup", "-i", "0-1", "--archive", str(target)]))
+        with tarfile.open(target) as tar:
+            content = tar_content(tar)
+        assert content == directory_backup(tmp_path)
+        assert (
+            "FIRST/2021-11-21 FIRST-3 - The title of the third issue/screenshot.png"
+            in content
+        )
+
+    def test_zip_has_files_of_backup(self, youtrack_server, tmp_path):
+        target = tmp_path / "backup.zip"
+        args = ["backup", "-j", "2", "-i", "0-1", "--archive", str(target)]
+        cli.backup(parse_arguments(args))
+        with zipfile.ZipFile(target) as archive:
+            content = {name: archive.read(name) for name in archive.namelist()}
+        assert content == directory_backup(tmp_path)
+
+    def test_no_directories_are_created(self, youtrack_server, tmp_path):
+        target = tmp_path / "backup.tar"
+        cli.backup(parse_arguments(["backup", "-i", "0-1", "--archive", str(target)]))
+        assert list(tmp_path.iterdir()) == [target]
+
+    def test_tar_to_stdout(self, youtrack_server, tmp_path, monkeypatch):
+        stdout = io.TextIOWrapper(io.BytesIO())
+        monkeypatch.setattr(sys, "stdout", stdout)
+        cli.backup(parse_arguments(["backup", "-i", "0-1", "--archive", "-"]))
+        stdout.buffer.seek(0)
+        with tarfile.open(fileobj=stdout.buffer, mode="r|") as tar:
+            names = [member.name for member in tar]
+        assert len(names) == 4
+        assert names[-1].endswith("/screenshot.png")
+
+
+def test_unknown_archive_type(tmp_path):
+    with pytest.raises(ValueError):
+        BackupArchive(str(tmp_path / "backup.rar"))
+
+
+@pytest.mark.parametrize(
+    "args",
+    [
+        ["backup"],
+        ["backup", "dir", "--archive", "backup.tar"],
+        ["backup", "--incremental", "--archive", "backup.tar"],
+    ],
+)
+def test_invalid_archive_arguments(args):
+    with pytest.raises(SystemExit):
+        parse_arguments(args)
@@ -0,0 +1,141 @@
+"""Test the on-disk response cache."""
+import json
+import os
+import time
+
+import pytest
+
+from ytissues import cli, transport, ytlib
+from ytissues.cache import ResponseCache
+from ytissues.cli import parse_arguments
+from ytissues.ytlib import Issue, IssueComment, get_projects, get_request
+
+
+@pytest.fixture
+def response_cache(monkeypatch, tmp_path):
+    cache = ResponseCache(tmp_path / "cache", ttl=60)
+    monkeypatch.setattr(ytlib, "response_cache", cache)
+    return cache
+
+
+def age(cache: ResponseCache, seconds: float):
+    """Let all cached responses be `seconds` older."""
+    for meta_path in cache.cache_dir.glob("*.json"):
+        meta = json.loads(meta_path.read_text())
+        meta["stored"] -= seconds
+        meta_path.write_text(json.dumps(meta))
+
+
+# noinspection PyUnusedLocal
+class TestResponseCache:
+    def test_fresh_response_is_used(self, youtrack_server, response_cache):
+        assert len(get_projects()) == 5
+        assert len(get_projects()) == 5
+        assert len(youtrack_server.requested_urls) == 1
+        assert (response_cache.hits, response_cache.misses) == (1, 1)
+
+    def test_loaders_share_the_cache(self, youtrack_server, response_cache):
+        for _ in range(2):
+            Issue.load("0-1")
+            IssueComment.load("2-2")
+            Issue("2-3", "0-1").load_attachments()
+        assert len(youtrack_server.requested_urls) == 3
+
+    def test_key_depends_on_fields(self, youtrack_server, response_cache):
+        Issue.load("0-1")
+        Issue.count("0-1")
+        assert len(youtrack_server.requested_urls) == 2
+
+    def test_key_depends_on_token(self, monkeypatch):
+        the_request = get_request("/resource", "fields=id")
+        monkeypatch.setenv("YT_AUTH", "perm:another-token")
+        other_request = get_request("/resource", "fields=id")
+        assert ResponseCache.key(the_request) != ResponseCache.key(other_request)
+
+    def test_expired_response_is_revalidated(self, youtrack_server, response_cache):
+        get_projects()
+        age(response_cache, 120)
+        assert len(get_projects()) == 5
+        assert response_cache.revalidated == 1
+        assert len(youtrack_server.requested_urls) == 2
+        assert len(get_projects()) == 5  # fresh again
+        assert len(youtrack_server.requested_urls) == 2
+
+    def test_expired_response_is_updated(self, youtrack_server, response_cache):
+        get_projects()
+        youtrack_server.routes["/youtrack/api/admin/projects"].pop()
+        age(response_cache, 120)
+        assert len(get_projects()) == 4
+        assert response_cache.misses == 2
+
+    def test_refresh_ignores_ttl(self, youtrack_server, response_cache):
+        get_projects()
+        response_cache.refresh = True
+        get_projects()
+        assert len(youtrack_server.requested_urls) == 2
+        assert response_cache.revalidated == 1
+
+    def test_revalidation_with_connection_pool(self, youtrack_server, response_cache):
+        transport.install_connection_pool()
+        try:
+            get_projects()
+            age(response_cache, 120)
+            assert len(get_projects()) == 5
+            assert response_cache.revalidated == 1
+        finally:
+            transport.uninstall_connection_pool()
+
+    def test_errors_are_not_cached(self, youtrack_server, response_cache):
+        with pytest.raises(IOError):
+            get_projects("0-42")
+        assert list(response_cache.cache_dir.iterdir()) == []
+
+    def test_least_recently_used_are_evicted(self, tmp_path):
+        cache = ResponseCache(tmp_path, max_size=1000)
+        fetched = []
+
+        def fetch(the_request):
+            fetched.append(the_request.full_url)
+            return 200, {}, b"x" * 400
+
+        requests = [get_request(f"/resource{number}", "") for number in range(3)]
+        cache.get(requests[0], fetch)
+        cache.get(requests[1], fetch)
+        past = time.time() - 10
+        os.utime(tmp_path / f"{cache.key(requests[1])}.json", (past, past))
+        cache.get(requests[0], fetch)  # used recently
+        cache.get(requests[2], fetch)
+        assert len(list(tmp_path.glob("*.body"))) == 2
+        assert not (tmp_path / f"{cache.key(requests[1])}.body").exists()
+        cache.get(requests[0], fetch)
+        assert len(fetched) == 3
+
+    def test_clear(self, youtrack_server, response_cache):
+        get_projects()
+        response_cache.clear()
+        assert list(response_cache.cache_dir.iterdir()) == []
+        get_projects()
+        assert len(youtrack_server.requested_urls) == 2
+
+
+class TestCacheOptions:
+    def configure(self, arguments: list[str]):
+        try:
+            cli.configure(parse_arguments(arguments + ["--pool-size", "0", "ls"]))
+            return ytlib.response_cache
+        finally:
+            ytlib.response_cache = None
+
+    def test_cache_is_off_by_default(self, monkeypatch):
+        monkeypatch.delenv("YT_CACHE_DIR", raising=False)
+        assert self.configure([]) is None
+
+    def test_cache_dir_option(self, tmp_path):
+        cache = self.configure(["--cache-dir", str(tmp_path), "--cache-ttl", "5"])
+        assert cache.cache_dir == tmp_path
+        assert cache.ttl == 5
+
+    def test_cache_dir_from_environment(self, monkeypatch, tmp_path):
+        monkeypatch.setenv("YT_CACHE_DIR", str(tmp_path))
+        assert self.configure(["--refresh"]).refresh
+        assert self.configure(["--no-cache"]) is None
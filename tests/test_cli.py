@@ -1,9 +1,9 @@
 """Test User API (command line interface)."""
-from unittest.mock import Mock, patch
+from unittest.mock import ANY, Mock, patch
 
 from ytissues import cli
 from ytissues.cli import parse_arguments
-from ytissues.ytlib import trim_filename, trim_pathname
+from ytissues.ytlib import Issue, trim_filename, trim_pathname
 
 
 def test_backup_command_respects_project_id():
@@ -14,25 +14,45 @@ def test_backup_command_respects_project_id():
 
 @patch("ytissues.cli.Project", autospec=True)
 @patch("ytissues.cli.get_project")
-def test_single_project_backup(mock_get_project, mock_project):
+def test_single_project_backup(mock_get_project, mock_project, tmp_path):
     mock_get_project.return_value = mock_project
-    args = parse_arguments(["backup", "-i", "0-1", "backup_dir"])
+    args = parse_arguments(["backup", "-i", "0-1", str(tmp_path)])
     cli.backup(args)
     mock_get_project.assert_called_once_with(args.project_id)
-    mock_project.backup.assert_called_once_with(args.backup_dir)
+    mock_project.backup.assert_called_once_with(
+        args.backup_dir, jobs=1, incremental=False, journal=ANY
+    )
 
 
 @patch("ytissues.cli.Project", autospec=True)
 @patch("ytissues.cli.get_projects")
-def test_all_project_backup(mock_get_projects, mock_project):
+def test_all_project_backup(mock_get_projects, mock_project, tmp_path):
     p1, p2, p3 = Mock(), Mock(), Mock()
     mock_get_projects.return_value = [p1, p2, p3]
-    args = parse_arguments(["backup", "backup_dir"])
+    args = parse_arguments(["backup", str(tmp_path)])
     cli.backup(args)
     mock_get_projects.assert_called_once()
-    p1.backup.assert_called_once_with(args.backup_dir)
-    p2.backup.assert_called_once_with(args.backup_dir)
-    p3.backup.assert_called_once_with(args.backup_dir)
+    p1.backup.assert_called_once_with(
+        args.backup_dir, jobs=1, incremental=False, journal=ANY
+    )
+    p2.backup.assert_called_once_with(
+        args.backup_dir, jobs=1, incremental=False, journal=ANY
+    )
+    p3.backup.assert_called_once_with(
+        args.backup_dir, jobs=1, incremental=False, journal=ANY
+    )
+
+
+def test_backup_jobs_option():
+    args = parse_arguments(["backup", "-j", "4", "backup_dir"])
+    assert args.jobs == 4
+
+
+def test_page_size_option():
+    args = parse_arguments(["--page-size", "25", "ls"])
+    assert args.page_size == 25
+    args = parse_arguments(["ls"])
+    assert args.page_size == Issue.page_size
 
 
 def test_ls_lists_projects_as_list():
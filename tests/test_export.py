@@ -0,0 +1,143 @@
+"""Test the export of issues in machine-readable formats."""
+import csv
+import io
+import json
+
+import pytest
+
+from ytissues import cli, export
+from ytissues.cli import parse_arguments
+from ytissues.export import ColumnarWriter, CsvWriter, issue_record
+from ytissues.ytlib import Project
+
+
+@pytest.fixture
+def issue_item() -> dict:
+    return {
+        "id": "2-1",
+        "idReadable": "FIRST-1",
+        "created": 1637587282538,
+        "updated": 1654071471241,
+        "resolved": None,
+        "summary": 'A summary; with "quotes", commas',
+        "description": "Line one\nline two",
+        "commentsCount": 1,
+        "comments": [
+            {
+                "id": "4-1",
+                "text": "A comment",
+                "created": 1637587282538,
+                "updated": None,
+                "author": {"name": "Maria", "$type": "User"},
+                "$type": "IssueComment",
+            }
+        ],
+        "attachments": [
+            {
+                "name": "screenshot.png",
+                "size": 11,
+                "mimeType": "image/png",
+                "extension": "png",
+                "charset": None,
+                "url": "/api/files/8-1?sign=abc",
+                "$type": "IssueAttachment",
+            }
+        ],
+        "$type": "Issue",
+    }
+
+
+@pytest.fixture
+def exported_server(youtrack_server):
+    """The stub service with the attachment included in the issue list."""
+    issues = youtrack_server.routes["/youtrack/api/admin/projects/0-1/issues"]
+    attachments = youtrack_server.routes["/youtrack/api/issues/2-3/attachments"]
+    for issue in issues:
+        issue["attachments"] = attachments if issue["id"] == "2-3" else []
+    return youtrack_server
+
+
+def test_issue_record(issue_item):
+    record = issue_record("0-1", issue_item)
+    assert record["project"] == "0-1"
+    assert record["summary"] == issue_item["summary"]
+    assert record["comments"] == [
+        {
+            "id": "4-1",
+            "issue": "2-1",
+            "author": "Maria",
+            "created": 1637587282538,
+            "updated": None,
+            "text": "A comment",
+        }
+    ]
+    assert record["attachments"][0]["issue"] == "2-1"
+    assert "$type" not in record["attachments"][0]
+
+
+def test_csv_quotes_separators(issue_item):
+    issues, comments = io.StringIO(), io.StringIO()
+    writer = CsvWriter(issues, comments)
+    writer.write(issue_record("0-1", issue_item))
+    rows = list(csv.reader(io.StringIO(issues.getvalue())))
+    assert rows[0] == list(export.issue_columns)
+    assert rows[1][6] == issue_item["summary"]
+    assert rows[1][7] == "Line one\nline two"
+    assert list(csv.reader(io.StringIO(comments.getvalue())))[1][2] == "Maria"
+
+
+def test_columnar_row_groups(issue_item, monkeypatch):
+    monkeypatch.setattr(ColumnarWriter, "row_group_size", 2)
+    file = io.StringIO()
+    writer = ColumnarWriter(file)
+    for number in range(3):
+        writer.write(issue_record("0-1", dict(issue_item, id=f"2-{number}")))
+    writer.close()
+    row_groups = [json.loads(line) for line in file.getvalue().splitlines()]
+    assert [(group["table"], group["rows"]) for group in row_groups] == [
+        ("issues", 2),
+        ("comments", 2),
+        ("attachments", 2),
+        ("issues", 1),
+        ("comments", 1),
+        ("attachments", 1),
+    ]
+    assert row_groups[0]["columns"]["id"] == ["2-0", "2-1"]
+    assert row_groups[3]["columns"]["created"] == [1637587282538]
+
+
+# noinspection PyUnusedLocal
+def test_ls_exports_jsonl(exported_server, capsys):
+    cli.ls(parse_arguments(["ls", "-i", "0-1", "--format", "jsonl"]))
+    records = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [record["id"] for record in records] == ["2-1", "2-2", "2-3"]
+    assert [comment["author"] for comment in records[1]["comments"]] == [
+        "Gustavo",
+        "Maria",
+    ]
+    assert records[2]["attachments"][0]["name"] == "screenshot.png"
+
+
+def test_backup_exports_files(exported_server, tmp_path):
+    cli.backup(
+        parse_arguments(["backup", "-i", "0-1", "--format", "csv", str(tmp_path)])
+    )
+    project_path = tmp_path / "FIRST"
+    assert sorted(path.name for path in project_path.iterdir()) == [
+        "attachments.csv",
+        "comments.csv",
+        "issues.csv",
+    ]
+    with open(project_path / "issues.csv", newline="") as file:
+        assert len(list(csv.reader(file))) == 4
+    assert not any(
+        url.startswith("/api/files/") for url in exported_server.requested_urls
+    )
+
+
+def test_export_project_with_query(exported_server):
+    file = io.StringIO()
+    writer = export.stream_writer("jsonl", file)
+    exported_server.routes["/youtrack/api/issues"] = []
+    assert export.export_project(Project("0-1", "FIRST"), writer, "#Unresolved") == 0
+    assert file.getvalue() == ""
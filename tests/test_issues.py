@@ -1,8 +1,12 @@
 """Test Issue class."""
+import io
+import textwrap
 from datetime import datetime
 from urllib import request
 
-from ytissues.ytlib import Issue, get_issue_data
+import pytest
+
+from ytissues.ytlib import Issue, IssueAttachment, IssueComment, get_issue_data
 
 
 # noinspection PyUnusedLocal
@@ -80,6 +84,13 @@ class TestIssueStructure:
         for number, issue in zip((0, 1, 42), one_project.issues):
             assert issue.comments_count == number
 
+    def test_models_have_no_instance_dict(self):
+        issue = Issue(issue_id="2-1", project_id="0-1")
+        comment = IssueComment(comment_id="4-1")
+        assert not hasattr(issue, "__dict__")
+        assert not hasattr(comment, "__dict__")
+        assert "__dict__" not in dir(IssueAttachment)
+
 
 def test_issue_as_csv():
     a_summary = "An issue to test."
@@ -121,3 +132,176 @@ def test_issue_as_csv_verbose():
         "2",
     ]
     assert csv == get_issue_data(issue, verbose=True)
+
+
+def concatenated_markdown(issue: Issue) -> str:
+    """The markdown file as built by concatenation, before `write_markdown`."""
+    if issue.resolved:
+        resolved_text = f"Resolved: {issue.resolved.strftime('%Y-%m-%d %H:%M')}.\n"
+    else:
+        resolved_text = "Resolved: No.\n"
+    issue_text = (
+        f"# {issue.summary}\n"
+        f"Created: {issue.created.strftime('%Y-%m-%d %H:%M')}\n"
+        f"Updated: {issue.updated.strftime('%Y-%m-%d %H:%M')}\n"
+        f"{resolved_text}\n"
+        f"{issue.description}\n"
+    )
+    issue_text += issue.attachment_list()
+    issue_text += "\n\n"
+    comments = ""
+    for comment in issue.comments:
+        comments += comment.as_text()
+    issue_text += textwrap.dedent(comments)
+    return issue_text
+
+
+@pytest.mark.parametrize(
+    "texts",
+    [
+        [],
+        ["The first comment.", "The second comment.\n\n    With an indented line."],
+        ["    indented\n\tand tabs\n", "  \n \t \n  trailing blanks  ", " "],
+        ["", "no newline", "  \r\n  crlf \r\n"],
+    ],
+)
+def test_markdown_is_unchanged(texts):
+    issue = Issue(
+        issue_id="2-1",
+        project_id="0-1",
+        id_readable="FIRST-1",
+        created=datetime(2022, 1, 1, 0, 0, 0),
+        updated=datetime(2022, 1, 2, 0, 0, 0),
+        resolved=None,
+        description="  An indented\n  description.",
+        summary="An issue to test.",
+    )
+    issue._comments = [
+        IssueComment(f"4-{i}", "Maria", datetime(2022, 1, 3), None, text)
+        for i, text in enumerate(texts)
+    ]
+    issue._attachments = [
+        IssueAttachment("2-1", "screenshot.png", 10, "image/png", "png", None, "/a")
+    ]
+    file = io.StringIO()
+    issue.write_markdown(file)
+    assert file.getvalue() == concatenated_markdown(issue)
+    assert issue.markdown() == file.getvalue()
+
+
+class TestIssuePaging:
+    def test_load_requests_all_pages(self, monkeypatch, paged_issue_list):
+        monkeypatch.setattr(request, "urlopen", paged_issue_list)
+        issues = Issue.load("0-1", page_size=2)
+        assert [issue.issue_id for issue in issues] == ["2-1", "2-2", "2-3"]
+        assert len(paged_issue_list.requested_urls) == 2
+        assert "$skip=0&$top=2" in paged_issue_list.requested_urls[0]
+        assert "$skip=2&$top=2" in paged_issue_list.requested_urls[1]
+
+    def test_full_last_page_requests_one_more_page(self, monkeypatch, paged_issue_list):
+        monkeypatch.setattr(request, "urlopen", paged_issue_list)
+        assert len(Issue.load("0-1", page_size=1)) == 3
+        assert len(paged_issue_list.requested_urls) == 4
+
+    def test_iter_load_is_lazy(self, monkeypatch, paged_issue_list):
+        monkeypatch.setattr(request, "urlopen", paged_issue_list)
+        issues = Issue.iter_load("0-1", page_size=1)
+        assert paged_issue_list.requested_urls == []
+        assert next(issues).issue_id == "2-1"
+        assert len(paged_issue_list.requested_urls) == 1
+
+    def test_page_size_must_be_positive(self, monkeypatch, paged_issue_list):
+        monkeypatch.setattr(request, "urlopen", paged_issue_list)
+        with pytest.raises(ValueError):
+            Issue.load("0-1", page_size=0)
+
+    def test_iter_issues_does_not_cache(
+        self, monkeypatch, one_project, paged_issue_list
+    ):
+        monkeypatch.setattr(request, "urlopen", paged_issue_list)
+        assert len(list(one_project.iter_issues())) == 3
+        assert one_project._issues is None
+
+
+@pytest.fixture
+def deep_issue_list(youtrack_server):
+    """Serve issues with comments and attachments included."""
+    issues = youtrack_server.routes["/youtrack/api/admin/projects/0-1/issues"]
+    comments = youtrack_server.routes["/youtrack/api/issues/2-2/comments"]
+    attachments = youtrack_server.routes["/youtrack/api/issues/2-3/attachments"]
+    for issue in issues:
+        issue["comments"], issue["attachments"] = [], []
+    issues[1]["comments"], issues[1]["commentsCount"] = comments, 2
+    issues[2]["attachments"] = attachments
+    issues[2]["comments"] = comments  # but commentsCount is 42: truncated
+    return youtrack_server
+
+
+# noinspection PyUnusedLocal
+class TestDeepFetch:
+    def test_query_fields(self):
+        assert Issue.query_fields() == Issue.fields
+        fields = Issue.query_fields(deep=True)
+        assert fields.startswith(Issue.fields)
+        assert ",comments(id,text,created,updated,author(name)" in fields
+        assert ",attachments(name,size,mimeType,extension,charset,url)" in fields
+
+    def test_deep_load_requests_nested_fields(self, deep_issue_list):
+        Issue.load("0-1", deep=True)
+        assert "comments(" in deep_issue_list.requested_urls[0]
+
+    def test_deep_load_fills_comments_and_attachments(self, deep_issue_list):
+        first, second, third = Issue.load("0-1", deep=True)
+        assert first.comments == [] and first.attachments == []
+        assert [comment.author for comment in second.comments] == [
+            "Gustavo",
+            "Maria",
+        ]
+        assert third.attachments[0].name == "screenshot.png"
+        assert len(deep_issue_list.requested_urls) == 1
+
+    def test_truncated_comments_are_loaded_per_issue(self, deep_issue_list):
+        third = Issue.load("0-1", deep=True)[2]
+        assert third._comments is None
+        assert third.comments == []  # the stub has no comments for 2-3
+        assert deep_issue_list.requested_urls[-1].startswith(
+            "/youtrack/api/issues/2-3/comments"
+        )
+
+    def test_backup_needs_no_request_per_issue(
+        self, deep_issue_list, one_project, tmp_path
+    ):
+        one_project.backup(str(tmp_path))
+        requested = [url.split("?")[0] for url in deep_issue_list.requested_urls[1:]]
+        assert requested == [
+            "/youtrack/api/issues/2-3/comments",
+            "/api/files/8-1",
+        ]
+
+
+# noinspection PyUnusedLocal
+class TestIssueCount:
+    def test_count_requests_ids_only(self, monkeypatch, paged_issue_list):
+        monkeypatch.setattr(request, "urlopen", paged_issue_list)
+        monkeypatch.setattr(Issue, "count_page_size", 2)
+        assert Issue.count("0-1") == 3
+        assert len(paged_issue_list.requested_urls) == 2
+        assert all("fields=id&" in url for url in paged_issue_list.requested_urls)
+
+    def test_count_of_single_item(self, monkeypatch, one_project_list):
+        monkeypatch.setattr(request, "urlopen", one_project_list)
+        assert Issue.count("0-1") == 1
+
+    def test_issue_count_is_cached(self, monkeypatch, one_project, paged_issue_list):
+        monkeypatch.setattr(request, "urlopen", paged_issue_list)
+        assert one_project.issue_count == 3
+        assert one_project.issue_count == 3
+        assert len(paged_issue_list.requested_urls) == 1
+
+    def test_issue_count_of_loaded_issues(
+        self, monkeypatch, one_project, paged_issue_list
+    ):
+        monkeypatch.setattr(request, "urlopen", paged_issue_list)
+        assert len(one_project.issues) == 3
+        assert one_project.issue_count == 3
+        assert len(paged_issue_list.requested_urls) == 1
@@ -0,0 +1,81 @@
+"""Test the columnar issue table."""
+import io
+import json
+from datetime import datetime
+
+import pytest
+
+from ytissues.ytlib import Issue, IssueTable, Project, get_issue_data
+
+
+@pytest.fixture
+def json_issues(filled_issue_list) -> list[dict]:
+    return json.loads(filled_issue_list().read())
+
+
+@pytest.fixture
+def issue_table(json_issues) -> IssueTable:
+    table = IssueTable()
+    table.extend_json(json_issues)
+    return table
+
+
+@pytest.mark.parametrize("verbose", [False, True])
+def test_rows_are_formatted_like_issues(json_issues, issue_table, verbose):
+    issues = Issue.list_from_json(json_issues, "0-1")
+    assert list(issue_table.rows(verbose)) == [
+        get_issue_data(issue, verbose) for issue in issues
+    ]
+
+
+def test_table_from_issues(json_issues, issue_table):
+    table = IssueTable.from_issues(Issue.list_from_json(json_issues, "0-1"))
+    assert list(table.rows(verbose=True)) == list(issue_table.rows(verbose=True))
+
+
+def test_missing_values(issue_table):
+    issue_table.extend_json({"id": "2-4"})
+    assert list(issue_table.rows())[-1] == ["2-4", "", "", "No", ""]
+    issue_table.extend_json({"error": "Not Found"})
+    assert len(issue_table) == 4
+
+
+def test_filter(issue_table):
+    assert issue_table.filter(unresolved=True).issue_ids == ["2-1", "2-2"]
+    since = datetime.fromtimestamp(1654072000)
+    assert issue_table.filter(updated_since=since).issue_ids == ["2-2"]
+    assert issue_table.filter(unresolved=True, updated_since=since).issue_ids == ["2-2"]
+
+
+def test_sort(issue_table):
+    assert issue_table.sort("created").issue_ids == ["2-2", "2-3", "2-1"]
+    assert issue_table.sort("updated", reverse=True).issue_ids == ["2-2", "2-1", "2-3"]
+    with pytest.raises(ValueError):
+        issue_table.sort("description")
+
+
+def test_take_keeps_columns_aligned(issue_table):
+    table = issue_table.take([2, 0])
+    assert table.issue_ids == ["2-3", "2-1"]
+    assert list(table.comments_counts) == [42, 0]
+    assert table.summaries[0].endswith("The title of the third issue")
+
+
+def test_write_csv(issue_table):
+    file = io.StringIO()
+    issue_table.write_csv(file, verbose=True)
+    lines = file.getvalue().splitlines()
+    assert lines[0] == "Issue ID;Created;Last Update;Resolved;Summary;Comments"
+    assert lines[3] == (
+        "2-3;FIRST-3;2021-11-21 03:00;2021-11-27 06:13;Yes;"
+        "2021-11-21 FIRST-3 - The title of the third issue;42"
+    )
+
+
+# noinspection PyUnusedLocal
+def test_issue_table_is_loaded_page_by_page(youtrack_server, monkeypatch):
+    monkeypatch.setattr(Issue, "page_size", 2)
+    project = Project("0-1", "FIRST")
+    assert [len(table) for table in project.iter_issue_tables()] == [2, 1]
+    assert project.issue_table().issue_ids == ["2-1", "2-2", "2-3"]
+    assert all("$top=2" in url for url in youtrack_server.requested_urls)
@@ -0,0 +1,269 @@
+"""Test incremental backups with the backup manifest."""
+import copy
+from datetime import datetime
+from urllib import parse
+
+import pytest
+
+from ytissues import cli
+from ytissues.cli import parse_arguments
+from ytissues.manifest import (
+    AttachmentIndex,
+    BackupJournal,
+    BackupManifest,
+    attachment_key,
+    link_file,
+    timestamp,
+)
+from ytissues.ytlib import Issue, IssueAttachment, Project
+
+
+@pytest.fixture
+def attachment():
+    return IssueAttachment(
+        issue_id="2-3",
+        name="screenshot.png",
+        size=11,
+        mimetype="image/png",
+        extension="png",
+        charset=None,
+        url="/api/files/8-1?sign=abc",
+    )
+
+
+class TestBackupManifest:
+    def test_empty_manifest(self, tmp_path):
+        manifest = BackupManifest.load(tmp_path)
+        assert manifest.last_sync is None
+        assert manifest.updated_query() is None
+        assert not manifest.is_unchanged(Issue("2-1", "0-1"))
+
+    def test_save_and_load(self, tmp_path, attachment):
+        manifest = BackupManifest.load(tmp_path)
+        issue = Issue("2-1", "0-1", updated=datetime(2022, 6, 1, 10, 17, 51, 241000))
+        manifest.issue_saved(issue)
+        manifest.attachment_saved(attachment, "cafe")
+        manifest.save()
+        loaded = BackupManifest.load(tmp_path)
+        assert loaded.last_sync == timestamp(issue.updated)
+        assert loaded.is_unchanged(issue)
+        assert loaded.attachments == {"/api/files/8-1": {"size": 11, "sha256": "cafe"}}
+        assert not (tmp_path / (BackupManifest.filename + ".tmp")).exists()
+
+    def test_changed_issue(self, tmp_path):
+        manifest = BackupManifest.load(tmp_path)
+        manifest.issue_saved(Issue("2-1", "0-1", updated=datetime(2022, 6, 1)))
+        assert not manifest.is_unchanged(
+            Issue("2-1", "0-1", updated=datetime(2022, 6, 2))
+        )
+
+    def test_last_sync_is_latest_update(self, tmp_path):
+        manifest = BackupManifest.load(tmp_path)
+        manifest.issue_saved(Issue("2-1", "0-1", updated=datetime(2022, 6, 2)))
+        manifest.issue_saved(Issue("2-2", "0-1", updated=datetime(2022, 6, 1)))
+        assert manifest.last_sync == timestamp(datetime(2022, 6, 2))
+        assert manifest.updated_query() == "updated: 2022-06-01T00:00:00 .. *"
+
+    def test_attachment_unchanged(self, tmp_path, attachment):
+        manifest = BackupManifest.load(tmp_path)
+        save_file = tmp_path / "screenshot.png"
+        manifest.attachment_saved(attachment, "cafe")
+        assert not manifest.is_attachment_unchanged(attachment, save_file)
+        save_file.write_bytes(b"PNG content")
+        assert manifest.is_attachment_unchanged(attachment, save_file)
+        attachment.url = "/api/files/8-1?sign=other"
+        assert manifest.is_attachment_unchanged(attachment, save_file)
+        attachment.size = 12
+        assert not manifest.is_attachment_unchanged(attachment, save_file)
+
+    def test_attachment_key_drops_signature(self):
+        assert attachment_key("/api/files/8-1?sign=abc&updated=1") == "/api/files/8-1"
+
+
+def requested_paths(server) -> list[str]:
+    return [parse.urlsplit(url).path for url in server.requested_urls]
+
+
+# noinspection PyUnusedLocal
+class TestIncrementalBackup:
+    def test_first_run_saves_all(self, youtrack_server, tmp_path):
+        Project("0-1", "FIRST").backup(str(tmp_path), incremental=True)
+        assert len(list(tmp_path.rglob("*.md"))) == 3
+        manifest = BackupManifest.load(tmp_path / "FIRST")
+        assert manifest.last_sync == 1654072471241
+        assert set(manifest.issues) == {"2-1", "2-2", "2-3"}
+        assert list(manifest.attachments) == ["/api/files/8-1"]
+
+    def test_second_run_saves_changed_issues(self, youtrack_server, tmp_path):
+        project = Project("0-1", "FIRST")
+        project.backup(str(tmp_path), incremental=True)
+        issues = youtrack_server.routes["/youtrack/api/admin/projects/0-1/issues"]
+        changed = copy.deepcopy(issues[1:])
+        changed[0]["updated"] += 1000
+        youtrack_server.routes["/youtrack/api/issues"] = changed
+        for path in tmp_path.rglob("*.md"):
+            path.unlink()
+        youtrack_server.requested_urls.clear()
+
+        project.backup(str(tmp_path), incremental=True)
+
+        assert [path.name for path in tmp_path.rglob("*.md")] == [
+            "2021-11-15 FIRST-2 - The title of the second issue.md"
+        ]
+        query = parse.parse_qs(parse.urlsplit(youtrack_server.requested_urls[0]).query)
+        assert query["query"] == ["project: {FIRST} updated: 2022-05-31T10:34:31 .. *"]
+        assert "/api/files/8-1" not in requested_paths(youtrack_server)
+        manifest = BackupManifest.load(tmp_path / "FIRST")
+        assert manifest.last_sync == 1654072472241
+
+    def test_changed_attachment_is_downloaded(self, youtrack_server, tmp_path):
+        project = Project("0-1", "FIRST")
+        project.backup(str(tmp_path), incremental=True)
+        issues = youtrack_server.routes["/youtrack/api/admin/projects/0-1/issues"]
+        changed = copy.deepcopy(issues[2:])
+        changed[0]["updated"] += 1000
+        youtrack_server.routes["/youtrack/api/issues"] = changed
+        youtrack_server.routes["/api/files/8-1"] = b"PNG content2"
+        youtrack_server.routes["/youtrack/api/issues/2-3/attachments"][0]["size"] = 12
+
+        project.backup(str(tmp_path), incremental=True)
+
+        assert "/api/files/8-1" in requested_paths(youtrack_server)
+        saved = next(tmp_path.rglob("screenshot.png"))
+        assert saved.read_bytes() == b"PNG content2"
+
+    def test_async_backup_is_incremental(self, youtrack_server, tmp_path):
+        args = ["backup", "--async", "--incremental", "-i", "0-1", str(tmp_path)]
+        cli.backup(parse_arguments(args))
+        assert len(BackupManifest.load(tmp_path / "FIRST").issues) == 3
+        youtrack_server.routes["/youtrack/api/issues"] = []
+        youtrack_server.requested_urls.clear()
+        cli.backup(parse_arguments(args))
+        assert requested_paths(youtrack_server) == [
+            "/youtrack/api/admin/projects/0-1",
+            "/youtrack/api/issues",
+        ]
+
+
+class TestBackupJournal:
+    def test_entries_are_kept_for_resume(self, tmp_path, attachment):
+        journal = BackupJournal.open(tmp_path)
+        journal.project_done("0-1")
+        journal.issue_done("2-1")
+        journal.attachment_done(attachment, "abc")
+        journal.close()
+        with open(journal.path, "a") as file:
+            file.write('{"issue": "2-')
+        save_file = tmp_path / "screenshot.png"
+        save_file.write_bytes(b"PNG content")
+
+        journal = BackupJournal.open(tmp_path, resume=True)
+        assert journal.is_project_done("0-1")
+        assert journal.is_issue_done("2-1")
+        assert not journal.is_issue_done("2-2")
+        assert journal.saved_attachment(attachment, save_file) == "abc"
+        save_file.write_bytes(b"PNG")
+        assert journal.saved_attachment(attachment, save_file) is None
+        journal.close()
+
+    def test_new_backup_starts_new_journal(self, tmp_path):
+        journal = BackupJournal.open(tmp_path)
+        journal.issue_done("2-1")
+        journal.close()
+        journal = BackupJournal.open(tmp_path)
+        assert not journal.is_issue_done("2-1")
+        journal.close()
+        assert BackupJournal.open(tmp_path, resume=True).issues == set()
+
+    def test_journal_is_removed_after_backup(self, youtrack_server, tmp_path):
+        cli.backup(parse_arguments(["backup", "-i", "0-1", str(tmp_path)]))
+        assert len(list(tmp_path.rglob("*.md"))) == 3
+        assert not (tmp_path / BackupJournal.filename).exists()
+
+    @pytest.mark.parametrize("options", [[], ["--async"]])
+    def test_interrupted_backup_is_resumed(self, youtrack_server, tmp_path, options):
+        args = ["backup", *options, "-i", "0-1", str(tmp_path)]
+        youtrack_server.failures["/api/files/8-1"] = [404]
+        with pytest.raises(IOError):
+            cli.backup(parse_arguments(args))
+        journal = BackupJournal.open(tmp_path, resume=True)
+        journal.close()
+        assert journal.issues == {"2-1", "2-2"}
+        for path in tmp_path.rglob("*.md"):
+            path.unlink()
+        youtrack_server.requested_urls.clear()
+
+        cli.backup(parse_arguments(["backup", "--resume", *args[1:]]))
+
+        assert [path.name for path in tmp_path.rglob("*.md")] == [
+            "2021-11-21 FIRST-3 - The title of the third issue.md"
+        ]
+        assert "/youtrack/api/issues/2-2/comments" not in requested_paths(
+            youtrack_server
+        )
+        assert not (tmp_path / BackupJournal.filename).exists()
+
+    def test_completed_project_is_skipped(self, youtrack_server, tmp_path):
+        journal = BackupJournal.open(tmp_path)
+        journal.project_done("0-1")
+        journal.close()
+        youtrack_server.requested_urls.clear()
+        cli.backup(parse_arguments(["backup", "--resume", "-i", "0-1", str(tmp_path)]))
+        assert requested_paths(youtrack_server) == ["/youtrack/api/admin/projects/0-1"]
+        assert list(tmp_path.rglob("*.md")) == []
+
+
+# noinspection PyUnusedLocal
+class TestAttachmentIndex:
+    def test_unchanged_attachment_is_not_downloaded(self, youtrack_server, tmp_path):
+        project = Project("0-1", "FIRST")
+        project.backup(str(tmp_path))
+        youtrack_server.requested_urls.clear()
+        project.backup(str(tmp_path))
+        assert "/api/files/8-1" not in requested_paths(youtrack_server)
+        index = AttachmentIndex.load(tmp_path)
+        entry = index.entries["/api/files/8-1"]
+        assert entry["path"].endswith("screenshot.png")
+        assert entry["size"] == 11
+
+    def test_modified_attachment_is_downloaded(self, youtrack_server, tmp_path):
+        project = Project("0-1", "FIRST")
+        project.backup(str(tmp_path))
+        saved = next(tmp_path.rglob("screenshot.png"))
+        saved.write_bytes(b"PNG changed")
+        youtrack_server.requested_urls.clear()
+        project.backup(str(tmp_path))
+        assert "/api/files/8-1" in requested_paths(youtrack_server)
+        assert saved.read_bytes() == b"PNG content"
+
+    def test_identical_attachments_are_linked(self, youtrack_server, tmp_path):
+        attachments = youtrack_server.routes["/youtrack/api/issues/2-3/attachments"]
+        duplicate = dict(attachments[0], url="/api/files/8-2?sign=def")
+        youtrack_server.routes["/youtrack/api/issues/2-1/attachments"] = [duplicate]
+        youtrack_server.routes["/api/files/8-2"] = b"PNG content"
+        Project("0-1", "FIRST").backup(str(tmp_path))
+        first, second = sorted(tmp_path.rglob("screenshot.png"))
+        assert first.read_bytes() == second.read_bytes() == b"PNG content"
+        assert first.stat().st_ino == second.stat().st_ino
+
+    def test_attachment_of_moved_issue_is_not_downloaded(
+        self, youtrack_server, tmp_path
+    ):
+        project = Project("0-1", "FIRST")
+        project.backup(str(tmp_path))
+        issues = youtrack_server.routes["/youtrack/api/admin/projects/0-1/issues"]
+        issues[2]["summary"] = "A new title"
+        youtrack_server.requested_urls.clear()
+        project.backup(str(tmp_path))
+        assert "/api/files/8-1" not in requested_paths(youtrack_server)
+        saved = sorted(tmp_path.rglob("screenshot.png"))
+        assert len(saved) == 2
+        assert saved[0].stat().st_ino == saved[1].stat().st_ino
+
+    def test_link_file(self, tmp_path):
+        source, target = tmp_path / "source", tmp_path / "target"
+        source.write_text("content")
+        target.write_text("other")
+        assert link_file(source, target)
+        assert target.read_text() == "content"
+        assert source.stat().st_ino == target.stat().st_ino
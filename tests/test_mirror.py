@@ -0,0 +1,107 @@
+"""Test the local SQLite mirror."""
+import copy
+from urllib import parse, request
+
+import pytest
+
+from ytissues import cli
+from ytissues.cli import parse_arguments
+from ytissues.mirror import Mirror
+from ytissues.ytlib import Project
+
+
+@pytest.fixture
+def mirror(tmp_path):
+    with Mirror(tmp_path / "mirror.sqlite") as mirror:
+        yield mirror
+
+
+def issue_ids(mirror: Mirror) -> list[str]:
+    rows = mirror.connection.execute("SELECT id FROM issues ORDER BY id")
+    return [row[0] for row in rows]
+
+
+def no_network(*args, **kwargs):
+    raise AssertionError("no request expected")
+
+
+# noinspection PyUnusedLocal
+class TestSync:
+    def test_first_sync_copies_all(self, youtrack_server, mirror):
+        assert mirror.sync(Project("0-1", "FIRST", "First Project")) == 3
+        assert issue_ids(mirror) == ["2-1", "2-2", "2-3"]
+        authors = mirror.connection.execute(
+            "SELECT author FROM comments WHERE issue_id = '2-2' ORDER BY id"
+        ).fetchall()
+        assert authors == [("Gustavo",), ("Maria",)]
+        assert mirror.last_sync("0-1") == 1654072471241
+
+    def test_full_text_search(self, youtrack_server, mirror):
+        mirror.sync(Project("0-1", "FIRST"))
+        rows = mirror.connection.execute(
+            "SELECT issues.id FROM issues_fts JOIN issues "
+            "ON issues.rowid = issues_fts.rowid WHERE issues_fts MATCH ?",
+            ("third",),
+        ).fetchall()
+        assert rows == [("2-3",)]
+
+    def test_second_sync_copies_updated_issues(self, youtrack_server, mirror):
+        project = Project("0-1", "FIRST")
+        mirror.sync(project)
+        issues = youtrack_server.routes["/youtrack/api/admin/projects/0-1/issues"]
+        changed = copy.deepcopy(issues[:1])
+        changed[0]["updated"] += 2000000
+        changed[0]["summary"] = "A changed title"
+        youtrack_server.routes["/youtrack/api/issues"] = changed
+        youtrack_server.requested_urls.clear()
+
+        assert mirror.sync(project) == 1
+
+        query = parse.parse_qs(parse.urlsplit(youtrack_server.requested_urls[0]).query)
+        assert query["query"] == ["project: {FIRST} updated: 2022-05-31T10:34:31 .. *"]
+        assert mirror.issue_table("0-1").summaries[0].endswith("A changed title")
+        assert len(mirror.issue_table("0-1")) == 3
+        assert mirror.last_sync("0-1") == 1654073471241
+
+    def test_full_sync_removes_deleted_issues(self, youtrack_server, mirror):
+        project = Project("0-1", "FIRST")
+        mirror.sync(project)
+        issues = youtrack_server.routes["/youtrack/api/admin/projects/0-1/issues"]
+        del issues[1]
+        mirror.sync(project, full=True)
+        assert issue_ids(mirror) == ["2-1", "2-3"]
+        count = mirror.connection.execute("SELECT count(*) FROM comments").fetchone()
+        assert count == (0,)
+
+    def test_issue_table_filters(self, youtrack_server, mirror):
+        mirror.sync(Project("0-1", "FIRST"))
+        assert mirror.issue_table("0-1", unresolved=True).issue_ids == ["2-1", "2-2"]
+        updated = mirror.issue_table("0-1", updated_since=1654072000000)
+        assert updated.issue_ids == ["2-2"]
+
+
+# noinspection PyUnusedLocal
+class TestOfflineLs:
+    @pytest.fixture
+    def db(self, youtrack_server, tmp_path, monkeypatch) -> str:
+        db = str(tmp_path / "mirror.sqlite")
+        cli.sync(parse_arguments(["sync", "--db", db, "-i", "0-1"]))
+        monkeypatch.setattr(request, "urlopen", no_network)
+        return db
+
+    def test_ls_projects(self, db, capsys):
+        cli.ls(parse_arguments(["ls", "--db", db, "-v"]))
+        assert capsys.readouterr().out == "0-1 FIRST First Project 3 issues\n"
+
+    def test_ls_issues(self, db, capsys):
+        cli.ls(parse_arguments(["ls", "--db", db, "-i", "0-1"]))
+        lines = capsys.readouterr().out.splitlines()
+        assert lines[0] == "Issue ID;Created;Last Update;Resolved;Summary"
+        assert lines[3] == (
+            "2-3;2021-11-21 03:00;2021-11-27 06:13;Yes;"
+            "2021-11-21 FIRST-3 - The title of the third issue"
+        )
+
+    def test_unknown_project(self, db):
+        with pytest.raises(ValueError):
+            cli.ls(parse_arguments(["ls", "--db", db, "-i", "0-2"]))
@@ -1,12 +1,18 @@
 """
 Test Project and Issues classes
 """
+import hashlib
+import threading
+import time
 from urllib import request
 
 import pytest
 
+from ytissues import ytlib
 from ytissues.cli import print_as_list, print_as_table, print_projects
-from ytissues.ytlib import Issue, Project
+from ytissues.manifest import AttachmentIndex
+from ytissues.search import SearchIndex
+from ytissues.ytlib import Issue, IssueAttachment, Project, bounded_map
 
 
 class TestProjectDisplaynames:
@@ -40,7 +46,7 @@ class TestProjectDisplaynames:
         assert p.as_plaintext() == result["plaintext"]
 
     def test_verbose_as_plaintext(self, monkeypatch):
-        monkeypatch.setattr(Project, "issues", ["issue1", "issue2"])
+        monkeypatch.setattr(Project, "issue_count", 2)
         p = Project(project_id="P_ID")
         assert p.as_plaintext(verbose=True) == "P_ID None None 2 issues"
 
@@ -99,7 +105,7 @@ class TestProject:
         assert err == ""
 
     def test_print_as_table_verbose(self, list_5_projects, monkeypatch, capfd):
-        monkeypatch.setattr(Project, "issues", ["issue1", "issue2"])
+        monkeypatch.setattr(Project, "issue_count", 2)
         print_as_table(list_5_projects, verbose=True)
         out, err = capfd.readouterr()
         for i in range(0, 5):
@@ -191,3 +197,166 @@ class TestProjectDetails:
         assert "Comments" in out
         assert "42" in out
         assert err == ""
+
+
+def read_tree(path) -> dict:
+    """Return the content of the backup files in `path`, without the indexes."""
+    return {
+        str(file.relative_to(path)): file.read_bytes()
+        for file in sorted(path.rglob("*"))
+        if file.is_file()
+        and file.name not in (AttachmentIndex.filename, SearchIndex.filename)
+    }
+
+
+# noinspection PyUnusedLocal
+class TestProjectBackup:
+    def test_backup_writes_issues_and_attachments(
+        self, one_project, monkeypatch, tmp_path, youtrack_api
+    ):
+        monkeypatch.setattr(request, "urlopen", youtrack_api)
+        one_project.backup(str(tmp_path))
+        files = read_tree(tmp_path)
+        assert len([name for name in files if name.endswith(".md")]) == 3
+        attachment = [name for name in files if name.endswith("screenshot.png")]
+        assert files[attachment[0]] == b"PNG content"
+        second = [name for name in files if "FIRST-2" in name][0]
+        assert b"**Comment by Maria" in files[second]
+
+    def test_concurrent_backup_writes_same_files(
+        self, one_project, monkeypatch, tmp_path, youtrack_api
+    ):
+        monkeypatch.setattr(request, "urlopen", youtrack_api)
+        one_project.backup(str(tmp_path / "sequential"))
+        one_project.backup(str(tmp_path / "concurrent"), jobs=4)
+        sequential = read_tree(tmp_path / "sequential")
+        assert sequential == read_tree(tmp_path / "concurrent")
+
+
+class TestBoundedMap:
+    def test_keeps_order(self):
+        def slow_square(number):
+            time.sleep(0.01 * (5 - number))
+            return number * number
+
+        assert list(bounded_map(slow_square, range(5), jobs=3)) == [0, 1, 4, 9, 16]
+
+    def test_consumes_iterable_lazily(self):
+        consumed = []
+
+        def numbers():
+            for number in range(100):
+                consumed.append(number)
+                yield number
+
+        results = bounded_map(lambda number: number, numbers(), jobs=2)
+        assert next(results) == 0
+        assert len(consumed) <= 5
+        results.close()
+
+    def test_raises_exception_of_job(self):
+        def fail(number):
+            raise IOError(f"Error {number}")
+
+        with pytest.raises(IOError):
+            list(bounded_map(fail, range(3), jobs=2))
+
+    def test_rejects_zero_jobs(self):
+        with pytest.raises(ValueError):
+            list(bounded_map(str, range(3), jobs=0))
+
+
+def test_requests_per_host_are_limited(monkeypatch):
+    monkeypatch.setattr(ytlib, "max_requests_per_host", 2)
+    monkeypatch.setattr(ytlib, "_host_slots", {})
+    in_flight, max_in_flight = 0, 0
+    lock = threading.Lock()
+
+    def mocked_urlopen(*args, **kwargs):
+        nonlocal in_flight, max_in_flight
+        with lock:
+            in_flight += 1
+            max_in_flight = max(in_flight, max_in_flight)
+        time.sleep(0.01)
+        with lock:
+            in_flight -= 1
+        return Response()
+
+    class Response:
+        def getcode(self):
+            return 200
+
+    def open_and_close(_):
+        with ytlib.open_url(request.Request("https://host/path")):
+            pass
+
+    monkeypatch.setattr(request, "urlopen", mocked_urlopen)
+    list(bounded_map(open_and_close, range(10), jobs=5))
+    assert max_in_flight == 2
+
+
+@pytest.fixture
+def attachment():
+    return IssueAttachment(
+        issue_id="2-3",
+        name="screenshot.png",
+        size=11,
+        mimetype="image/png",
+        extension="png",
+        charset=None,
+        url="/api/files/8-1?sign=abc",
+    )
+
+
+# noinspection PyUnusedLocal
+class TestAttachmentDownload:
+    def test_download_in_chunks(
+        self, youtrack_server, attachment, tmp_path, monkeypatch
+    ):
+        monkeypatch.setattr(IssueAttachment, "chunk_size", 4)
+        save_file = tmp_path / attachment.name
+        sha256 = attachment.download(save_file)
+        assert save_file.read_bytes() == b"PNG content"
+        assert sha256 == hashlib.sha256(b"PNG content").hexdigest()
+        assert not save_file.with_name("screenshot.png.part").exists()
+
+    def test_download_resumes_part_file(self, youtrack_server, attachment, tmp_path):
+        save_file = tmp_path / attachment.name
+        save_file.with_name("screenshot.png.part").write_bytes(b"PNG")
+        sha256 = attachment.download(save_file)
+        assert youtrack_server.requested_ranges == ["bytes=3-"]
+        assert save_file.read_bytes() == b"PNG content"
+        assert sha256 == hashlib.sha256(b"PNG content").hexdigest()
+
+    def test_complete_part_file_is_renamed(self, youtrack_server, attachment, tmp_path):
+        save_file = tmp_path / attachment.name
+        save_file.with_name("screenshot.png.part").write_bytes(b"PNG content")
+        attachment.download(save_file)
+        assert youtrack_server.requested_urls == []
+        assert save_file.read_bytes() == b"PNG content"
+
+    def test_download_without_range_support(
+        self, monkeypatch, attachment, tmp_path, youtrack_api
+    ):
+        monkeypatch.setattr(request, "urlopen", youtrack_api)
+        save_file = tmp_path / attachment.name
+        save_file.with_name("screenshot.png.part").write_bytes(b"XXX")
+        attachment.download(save_file)
+        assert save_file.read_bytes() == b"PNG content"
+
+    def test_wrong_size_raises(self, youtrack_server, attachment, tmp_path):
+        attachment.size = 20
+        save_file = tmp_path / attachment.name
+        with pytest.raises(IOError):
+            attachment.download(save_file)
+        assert not save_file.exists()
+        assert save_file.with_name("screenshot.png.part").exists()
+
+    def test_too_large_part_file_is_removed(
+        self, youtrack_server, attachment, tmp_path
+    ):
+        attachment.size = 5
+        save_file = tmp_path / attachment.name
+        with pytest.raises(IOError):
+            attachment.download(save_file)
+        assert not save_file.with_name("screenshot.png.part").exists()
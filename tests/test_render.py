@@ -0,0 +1,66 @@
+"""Test the streaming table output."""
+import io
+
+import pytest
+
+from ytissues.render import Column, StreamingTable
+
+
+@pytest.fixture
+def columns() -> list[Column]:
+    return [Column("ID", 4, "right"), Column("State", 5, "center"), Column("Text")]
+
+
+def test_table_layout(columns):
+    file = io.StringIO()
+    table = StreamingTable(columns, title="Title", file=file, width=40)
+    table.print_rows([["2-1", "Open", "A text, which is too long for one line"]])
+    table.print_footer(caption="1 row")
+    assert file.getvalue().splitlines() == [
+        "                 Title",
+        "╭──────┬───────┬───────────────────────╮",
+        "│   ID │ State │ Text                  │",
+        "├──────┼───────┼───────────────────────┤",
+        "│  2-1 │  Open │ A text, which is too  │",
+        "│      │       │ long for one line     │",
+        "╰──────┴───────┴───────────────────────╯",
+        "                 1 row",
+    ]
+    assert table.width == 40
+    assert table.rows == 1
+
+
+def test_long_values_are_cut(columns):
+    file = io.StringIO()
+    table = StreamingTable(columns, file=file, width=40)
+    table.print_rows([["12345", "Resolved", ""]])
+    assert "│ 123… │ Reso… │                       │" in file.getvalue()
+
+
+def test_nothing_is_printed_before_the_first_rows(columns):
+    file = io.StringIO()
+    table = StreamingTable(columns, title="Title", file=file, width=40)
+    assert file.getvalue() == ""
+    table.print_rows(iter([]))
+    table.print_footer()
+    assert len(file.getvalue().splitlines()) == 5
+
+
+def test_wrapping_column_has_minimum_width(columns):
+    table = StreamingTable(columns, width=10)
+    assert table.widths == [4, 5, StreamingTable.min_width]
+
+
+# noinspection PyUnusedLocal
+def test_rows_are_printed_page_by_page(youtrack_server, monkeypatch, capsys):
+    from ytissues.ytlib import Issue, Project
+
+    monkeypatch.setattr(Issue, "page_size", 2)
+    printed = []
+    monkeypatch.setattr(
+        StreamingTable,
+        "print_rows",
+        lambda self, rows: printed.append(len(list(rows))),
+    )
+    Project("0-1", "FIRST").print_details(as_table=True, verbose=False)
+    assert printed == [2, 1]
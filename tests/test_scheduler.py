@@ -0,0 +1,174 @@
+"""Test the retries and the adaptive rate limiting of requests."""
+from email.message import Message
+from urllib import request
+from urllib.error import HTTPError, URLError
+
+import pytest
+
+from ytissues import ytlib
+from ytissues.cli import configure, parse_arguments
+from ytissues.scheduler import RequestScheduler, retry_after_seconds
+from ytissues.ytlib import get_projects
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def scheduler():
+    scheduler = RequestScheduler(max_retries=3, backoff=1.0)
+    scheduler.clock = clock = FakeClock()
+    scheduler.sleep = clock.sleep
+    return scheduler
+
+
+def http_error(code, retry_after=None):
+    headers = Message()
+    if retry_after is not None:
+        headers["Retry-After"] = retry_after
+    return HTTPError("https://host/path", code, "error", headers, None)
+
+
+class Response:
+    def __init__(self, status):
+        self.status = status
+
+    def getcode(self):
+        return self.status
+
+
+def answers(*results):
+    results = list(results)
+
+    def open_response():
+        result = results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    return open_response
+
+
+def test_retry_after_seconds():
+    assert retry_after_seconds(None) is None
+    assert retry_after_seconds("3") == 3.0
+    assert retry_after_seconds("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert retry_after_seconds("soon") is None
+
+
+def test_retries_with_exponential_backoff(scheduler):
+    ok = Response(200)
+    response = scheduler.call(
+        answers(http_error(502), http_error(504), URLError("x"), ok)
+    )
+    assert response is ok
+    assert scheduler.retries == 3
+    delays = scheduler.clock.sleeps
+    assert 0.5 <= delays[0] <= 1.0
+    assert 1.0 <= delays[1] <= 2.0
+    assert 2.0 <= delays[2] <= 4.0
+
+
+def test_backoff_is_capped(scheduler):
+    scheduler.max_backoff = 5
+    assert scheduler.delay(10) <= 5
+
+
+def test_honours_retry_after(scheduler):
+    scheduler.call(answers(http_error(429, "7"), Response(200)))
+    assert scheduler.clock.sleeps == [7.0]
+    assert scheduler.throttled == 1
+
+
+def test_retries_status_of_response(scheduler):
+    ok = Response(200)
+    assert scheduler.call(answers(Response(503), ok)) is ok
+    assert scheduler.retries == 1
+
+
+def test_gives_up_after_max_retries(scheduler):
+    with pytest.raises(HTTPError):
+        scheduler.call(answers(*[http_error(503, "0")] * 4))
+    assert scheduler.retries == 3
+    last = Response(503)
+    assert scheduler.call(answers(*[Response(503)] * 3, last)) is last
+
+
+def test_client_errors_are_not_retried(scheduler):
+    with pytest.raises(HTTPError):
+        scheduler.call(answers(http_error(404), Response(200)))
+    assert scheduler.retries == 0
+
+
+def test_throttling_halves_the_rate(scheduler):
+    scheduler.rate = 10.0
+    scheduler.on_throttle(0)
+    assert scheduler.rate == 5.0
+    for _ in range(5):
+        scheduler.on_success()
+    assert 5.9 < scheduler.rate < 6.0
+
+
+def test_first_throttling_uses_observed_rate(scheduler):
+    for _ in range(11):
+        scheduler.wait_turn()
+        scheduler.clock.now += 0.1
+    assert scheduler.rate is None
+    scheduler.on_throttle(0)
+    assert scheduler.rate == pytest.approx(5.0)
+
+
+def test_rate_never_exceeds_max_rate(scheduler):
+    scheduler.rate = scheduler.max_rate = 4.0
+    scheduler.on_success()
+    assert scheduler.rate == 4.0
+
+
+def test_requests_are_paced(scheduler):
+    scheduler.rate = 4.0
+    for _ in range(3):
+        scheduler.wait_turn()
+    assert scheduler.clock.sleeps == [0.25, 0.25]
+
+
+def test_throttling_delays_all_requests(scheduler):
+    scheduler.on_throttle(3.0)
+    scheduler.wait_turn()
+    assert scheduler.clock.sleeps == [3.0]
+
+
+def test_loaders_retry_throttled_requests(youtrack_server, monkeypatch):
+    scheduler = RequestScheduler()
+    scheduler.initial_rate = 1000.0
+    monkeypatch.setattr(ytlib, "request_scheduler", scheduler)
+    youtrack_server.failures["/youtrack/api/admin/projects"] = [429, 503]
+    assert len(get_projects()) == 5
+    assert len(youtrack_server.requested_urls) == 3
+    assert scheduler.throttled == 2
+    assert scheduler.rate == pytest.approx(250.0, abs=0.1)
+
+
+def test_not_found_is_not_retried(youtrack_server, monkeypatch):
+    monkeypatch.setattr(ytlib, "request_scheduler", RequestScheduler())
+    with pytest.raises(IOError):
+        get_projects("NOT_EXISTENT")
+    assert len(youtrack_server.requested_urls) == 1
+
+
+def test_configure_sets_the_scheduler(monkeypatch):
+    monkeypatch.setattr(ytlib, "request_scheduler", None)
+    monkeypatch.setattr(request, "_opener", None)
+    args = parse_arguments(["--retries", "2", "--max-rate", "3", "ls"])
+    configure(args)
+    assert ytlib.request_scheduler.max_retries == 2
+    assert ytlib.request_scheduler.rate == 3.0
@@ -0,0 +1,76 @@
+"""Test the full-text search in a backup."""
+import pytest
+
+from ytissues import cli
+from ytissues.cli import parse_arguments
+from ytissues.search import SearchIndex, fts_query
+from ytissues.ytlib import Project
+
+SECOND = "FIRST/2021-11-15 FIRST-2 - The title of the second issue"
+THIRD = "FIRST/2021-11-21 FIRST-3 - The title of the third issue"
+
+
+def test_fts_query():
+    assert fts_query("first issue") == '"first" "issue"'
+    assert fts_query('tit* "quoted" (x)') == '"tit"* """quoted""" "(x)"'
+    assert fts_query(" * ") == ""
+
+
+@pytest.fixture
+def backup_path(youtrack_server, tmp_path):
+    Project("0-1", "FIRST").backup(str(tmp_path))
+    return tmp_path
+
+
+# noinspection PyUnusedLocal
+class TestSearchIndex:
+    def test_backup_builds_index(self, backup_path):
+        with SearchIndex.open(backup_path) as search_index:
+            results = search_index.search("third")
+        assert [result.issue_id for result in results] == ["2-3"]
+        assert results[0].path == f"{THIRD}/{THIRD.split('/')[1]}.md"
+        assert "[third]" in results[0].snippet
+
+    def test_comments_are_searched(self, backup_path):
+        with SearchIndex.open(backup_path) as search_index:
+            results = search_index.search("indented")
+        assert [result.id_readable for result in results] == ["FIRST-2"]
+
+    def test_summary_ranks_before_description(self, backup_path):
+        with SearchIndex.open(backup_path) as search_index:
+            search_index.connection.execute(
+                "UPDATE issues_fts SET description = 'about the second issue' "
+                "WHERE rowid = (SELECT rowid FROM issues WHERE id = '2-1')"
+            )
+            results = search_index.search("second")
+        assert [result.issue_id for result in results] == ["2-2", "2-1"]
+
+    def test_prefix_search(self, backup_path):
+        with SearchIndex.open(backup_path) as search_index:
+            assert len(search_index.search("explan*")) == 3
+            assert search_index.search("explan") == []
+            assert search_index.search("") == []
+
+    def test_issues_are_replaced(self, youtrack_server, backup_path):
+        issues = youtrack_server.routes["/youtrack/api/admin/projects/0-1/issues"]
+        issues[2]["summary"] = "A new title"
+        Project("0-1", "FIRST").backup(str(backup_path))
+        with SearchIndex.open(backup_path) as search_index:
+            results = search_index.search("third")
+            count = search_index.connection.execute("SELECT count(*) FROM issues")
+            assert count.fetchone() == (3,)
+        assert [result.issue_id for result in results] == ["2-3"]
+        assert results[0].path.startswith("FIRST/2021-11-21 FIRST-3 - A new title/")
+
+
+# noinspection PyUnusedLocal
+class TestSearchCommand:
+    def test_search_prints_paths(self, backup_path, capsys):
+        cli.search(parse_arguments(["search", "-d", str(backup_path), "second"]))
+        lines = capsys.readouterr().out.splitlines()
+        assert lines[0].startswith(SECOND)
+        assert "[second]" in lines[1]
+
+    def test_search_without_index(self, tmp_path):
+        with pytest.raises(FileNotFoundError):
+            cli.search(parse_arguments(["search", "-d", str(tmp_path), "second"]))
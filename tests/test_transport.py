@@ -0,0 +1,102 @@
+"""Test the HTTP transport with persistent connections."""
+import json
+from urllib import request
+
+import pytest
+
+from ytissues import cli, transport
+from ytissues.cli import parse_arguments
+from ytissues.transport import ConnectionPool
+from ytissues.ytlib import Issue, get_projects
+
+
+@pytest.fixture
+def connection_pool():
+    pool = transport.install_connection_pool(pool_size=2)
+    yield pool
+    transport.uninstall_connection_pool()
+
+
+# noinspection PyUnusedLocal
+class TestKeepAlive:
+    def test_connection_is_reused(self, youtrack_server, connection_pool):
+        for _ in range(3):
+            assert len(get_projects()) == 5
+        assert connection_pool.created == 1
+        assert connection_pool.reused == 2
+
+    def test_all_loaders_use_the_pool(self, youtrack_server, connection_pool):
+        issues = Issue.load("0-1", page_size=2)
+        for issue in issues:
+            assert issue.comments is not None
+            assert issue.attachments is not None
+        assert connection_pool.requests == 8
+        assert connection_pool.created == 1
+
+    def test_attachment_download_uses_the_pool(
+        self, youtrack_server, connection_pool, tmp_path
+    ):
+        for issue in Issue.load("0-1"):
+            issue.backup(tmp_path)
+        assert connection_pool.created == 1
+        assert next(tmp_path.rglob("screenshot.png")).read_bytes() == b"PNG content"
+
+    def test_unread_response_closes_connection(self, youtrack_server, connection_pool):
+        url = f"{youtrack_server.url}/youtrack/api/admin/projects"
+        request.urlopen(url).close()
+        with request.urlopen(url) as response:
+            assert len(json.loads(response.read())) == 5
+        assert connection_pool.created == 2
+
+    def test_stale_connection_is_replaced(self, youtrack_server, connection_pool):
+        get_projects()
+        for connections in connection_pool._idle.values():
+            for connection in connections:
+                connection.sock.close()
+        assert len(get_projects()) == 5
+        assert connection_pool.created == 2
+
+    def test_http_errors_are_raised(self, youtrack_server, connection_pool):
+        with pytest.raises(IOError):
+            get_projects("0-42")
+
+
+class TestConnectionPool:
+    def test_pool_keeps_pool_size_connections(self):
+        class Connection:
+            closed = False
+
+            def close(self):
+                self.closed = True
+
+        pool = ConnectionPool(pool_size=1)
+        first, second = Connection(), Connection()
+        pool.release(("https", "host"), first)
+        pool.release(("https", "host"), second)
+        assert second.closed and not first.closed
+        assert pool.acquire(("https", "host"), Connection) == (first, True)
+        connection, reused = pool.acquire(("https", "host"), Connection)
+        assert not reused and connection not in (first, second)
+
+    def test_stats(self):
+        pool = ConnectionPool()
+        assert pool.stats() == "HTTP connections: no requests."
+        pool.created, pool.reused = 1, 3
+        assert pool.stats() == (
+            "HTTP connections: 1 opened, 3 reused (75% of 4 requests)."
+        )
+
+    def test_pool_size_must_be_positive(self):
+        with pytest.raises(ValueError):
+            ConnectionPool(pool_size=0)
+
+
+def test_cli_configures_pool():
+    args = parse_arguments(["--pool-size", "3", "ls"])
+    try:
+        cli.configure(args)
+        assert transport.connection_pool.pool_size == 3
+        cli.configure(parse_arguments(["--pool-size", "0", "ls"]))
+        assert transport.connection_pool is None
+    finally:
+        transport.uninstall_connection_pool()